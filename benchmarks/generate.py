@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic rule files generator : writes rule files of a given shape and size
+to benchmark the solver with (see benchmarks.suite).
+
+Shapes :
+- chain : size implications, each premise being the previous conclusion.
+- fanin : a single rule whose premise is a conjunction of size operands (at
+  most 360 operands over 6 atoms).
+- nested : a rule whose premise is a complete expression tree of depth size
+  (2 ** size leaves over 6 atoms).
+- equivalence : size equivalences, each one between an expression and a
+  rewriting of it (distributivity, De Morgan's laws...).
+- cyclic : cycles of 5 implications over size predicates, each cycle being
+  implied by a predicate of a previous one.
+- horn : size Horn rules, conjunctions of 1 to 3 atoms implying an atom.
+
+Atoms are single letters, and comparing predicates costs 3 ** n operations
+for n atoms (see src.TruthTables), so the intermediate predicates only use
+a few of them : the size of a file comes from its number of predicates.
+
+usage: python3 -m benchmarks.generate shape size [seed]
+"""
+
+import itertools
+import random
+import string
+import sys
+
+################################################################################
+#                          Synthetic rule files                                #
+################################################################################
+
+letters = string.ascii_uppercase
+
+# Expressions of 3 atoms the nodes of the rules are made of, with an
+# equivalent rewriting of each one.
+node_patterns = (
+    ('({0} | {1}) + {2}', '({0} + {2}) | ({1} + {2})'),
+    ('({0} ^ {1}) | {2}', '(({0} | {1}) + !({0} + {1})) | {2}'),
+    ('{0} + {1} + {2}', '!(!{0} | !{1} | !{2})')
+)
+
+def make_nodes(count, atoms=letters, rewritten=False):
+
+    """
+    Returns count (at most) different expressions of 3 of the given atoms, or
+    (expression, rewriting) pairs if rewritten is True.
+    """
+
+    return list(itertools.islice(
+        (
+            tuple(p.format(*a) for p in patterns) if rewritten
+            else patterns[0].format(*a)
+            for patterns in node_patterns
+            for a in itertools.permutations(atoms, 3)
+        ),
+        count
+    ))
+
+def make_tree(rng, atoms, depth):
+
+    """
+    Returns a complete expression tree of the given depth.
+    """
+
+    if depth == 0:
+        return rng.choice(atoms)
+    return '(%s %s %s)' % (
+        make_tree(rng, atoms, depth - 1),
+        rng.choice('+|^'),
+        make_tree(rng, atoms, depth - 1)
+    )
+
+def make_chain(size, rng):
+    nodes = make_nodes(size + 1)
+    rules = [
+        '%s => %s' % (nodes[i], nodes[i + 1]) for i in range(size)
+    ]
+    return rules, 'ABC', letters
+
+def make_fanin(size, rng):
+    operands = [
+        '(%s)' % rewriting
+        for node, rewriting in make_nodes(size, letters[:6], True)
+    ]
+    rules = ['%s => Z' % ' + '.join(operands)]
+    return rules, letters[:6], 'Z'
+
+def make_nested(size, rng):
+    # Z being the only fact, the premise is never deduced from the
+    # conclusion, and its atoms take their default value.
+    rules = ['%s => Z' % make_tree(rng, letters[:6], size)]
+    return rules, 'Z', letters[:6] + 'Z'
+
+def make_equivalence(size, rng):
+    rules = [
+        '%s <=> %s' % pair for pair in make_nodes(size, rewritten=True)
+    ]
+    return rules, ''.join(rng.sample(letters, 5)), letters
+
+def make_cyclic(size, rng):
+    nodes = make_nodes(size)
+    rules = []
+    for start in range(0, size, 5):
+        cycle = nodes[start:start + 5]
+        for i, node in enumerate(cycle):
+            rules.append('%s => %s' % (node, cycle[(i + 1) % len(cycle)]))
+        if start:
+            rules.append('%s => %s' % (rng.choice(nodes[:start]), cycle[0]))
+    return rules, 'ABC', letters
+
+def make_horn(size, rng):
+    rules = []
+    for i in range(size):
+        conclusion = rng.randrange(1, len(letters))
+        premises = rng.sample(
+            letters[:conclusion], min(conclusion, rng.randint(1, 3))
+        )
+        rules.append('%s => %s' % (' + '.join(premises), letters[conclusion]))
+    return rules, 'AB', letters
+
+shapes = {
+    'chain' : make_chain,
+    'fanin' : make_fanin,
+    'nested' : make_nested,
+    'equivalence' : make_equivalence,
+    'cyclic' : make_cyclic,
+    'horn' : make_horn
+}
+
+def write_rules(f, shape, size, seed=0):
+
+    """
+    Writes the rule file of the given shape and size (see shapes) to f and
+    returns its number of rules.
+    """
+
+    rules, facts, queries = shapes[shape](size, random.Random(seed))
+    for rule in rules:
+        f.write(rule + '\n')
+    f.write('\n=%s\n\n?%s\n' % (facts, queries))
+    return len(rules)
+
+
+if __name__ == '__main__':
+    write_rules(
+        sys.stdout, sys.argv[1], int(sys.argv[2]),
+        int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    )
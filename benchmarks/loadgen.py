@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Load generator : sends random scenarios (see benchmarks.parallel) to a query
+server (see src.Server) from concurrent connections, each connection waiting
+for a response before sending its next request, and prints the throughput
+and the latency percentiles of the requests.
+
+Start the server first, e.g. :
+python3 expert_system.py serve -u /tmp/expert.sock rules.txt
+
+usage: python3 -m benchmarks.loadgen [-u SOCKET | --host HOST --port PORT]
+                                     [-c CONNECTIONS] [-n REQUESTS]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import time
+from benchmarks.parallel import write_scenarios
+
+################################################################################
+#                               Load generator                                 #
+################################################################################
+
+async def open_connection(socket_path, host, port):
+    if socket_path:
+        return await asyncio.open_unix_connection(socket_path)
+    return await asyncio.open_connection(host, port)
+
+async def run_client(lines, latencies, socket_path, host, port):
+
+    """
+    Sends the given request lines one at a time over a new connection and
+    appends the latency of each one to latencies.
+    """
+
+    reader, writer = await open_connection(socket_path, host, port)
+    try:
+        for line in lines:
+            start = time.perf_counter()
+            writer.write(line.encode() + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if 'error' in response and 'results' not in response:
+                raise RuntimeError('request %s failed : %s' % (
+                    line, response['error']
+                ))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+async def main(connections, requests, socket_path=None, host='127.0.0.1',
+               port=8642):
+    scenarios = io.StringIO()
+    write_scenarios(scenarios, requests)
+    lines = scenarios.getvalue().splitlines()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(lines[i::connections], latencies, socket_path, host, port)
+        for i in range(connections)
+    ))
+    duration = time.perf_counter() - start
+    latencies.sort()
+    print("%d requests over %d connections : %.1f requests/s" % (
+        len(latencies), connections, len(latencies) / duration
+    ))
+    print("latency (ms) : p50 %.3f  p90 %.3f  p99 %.3f  max %.3f" % tuple(
+        1000 * percentile(latencies, p) for p in (50, 90, 99, 100)
+    ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure the latency of a query server.'
+    )
+    parser.add_argument(
+        '-u', '--unix', type=str, metavar='SOCKET',
+        help='Unix socket the server listens on (instead of TCP).'
+    )
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8642)
+    parser.add_argument(
+        '-c', '--connections', type=int, default=8,
+        help='number of concurrent connections.'
+    )
+    parser.add_argument(
+        '-n', '--requests', type=int, default=2000,
+        help='total number of requests.'
+    )
+    args = parser.parse_args()
+    asyncio.run(main(
+        args.connections, args.requests, args.unix, args.host, args.port
+    ))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+Memory benchmark : compares the memory held by a parsed knowledge base (with
+every result built) with the memory held by its CompactGraph.
+
+usage: python3 -m benchmarks.memory [rules_number]
+"""
+
+import gc
+import random
+import string
+import sys
+import tempfile
+import tracemalloc
+import src.parsing
+import src.CompactGraph
+
+################################################################################
+#                               Memory benchmark                               #
+################################################################################
+
+def make_expression(rng, atoms, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(atoms)
+    if rng.random() < 0.2:
+        return '!' + make_expression(rng, atoms, depth - 1)
+    return '(%s %s %s)' % (
+        make_expression(rng, atoms, depth - 1),
+        rng.choice('+|^'),
+        make_expression(rng, atoms, depth - 1)
+    )
+
+def write_rules(f, rules_number, seed=0):
+
+    """
+    Writes a rule file made of rules_number random implications over 5 atoms
+    wide windows of the alphabet.
+    """
+
+    rng = random.Random(seed)
+    letters = string.ascii_uppercase
+    for i in range(rules_number):
+        start = rng.randrange(len(letters) - 5)
+        atoms = letters[start:start + 5]
+        f.write('%s => %s\n' % (
+            make_expression(rng, atoms, 3),
+            rng.choice(letters)
+        ))
+    f.write('\n=A\n\n?%s\n' % letters)
+
+def measure(function):
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def load(filename):
+    kb = src.parsing.parse(filename)
+    for p in kb.list_predicates():
+        if not p.results_built:
+            p.make_results()
+    return kb
+
+def main(rules_number):
+    with tempfile.NamedTemporaryFile('w', suffix='.txt') as f:
+        write_rules(f, rules_number)
+        f.flush()
+        kb, kb_size = measure(lambda: load(f.name))
+    predicates = len(kb.list_predicates())
+    results = sum(len(p.results) for p in kb.list_predicates())
+    graph, graph_size = measure(
+        lambda: src.CompactGraph.CompactGraph.from_kb(kb)
+    )
+    print("predicates : %d, results : %d" % (predicates, results))
+    print("knowledge base : %10d bytes" % kb_size)
+    print("compact graph  : %10d bytes (%.1f%%)" % (
+        graph_size, 100 * graph_size / kb_size
+    ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
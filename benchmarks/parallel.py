@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+Parallel scenarios benchmark : solves the same scenarios with an increasing
+number of worker processes and prints the throughput of each run.
+
+usage: python3 -m benchmarks.parallel [scenarios_number [engine]]
+"""
+
+import io
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import src.parsing
+import src.CompactGraph
+import src.Scenarios
+from benchmarks.memory import write_rules
+
+################################################################################
+#                          Parallel scenarios benchmark                        #
+################################################################################
+
+def write_scenarios(f, scenarios_number, seed=0):
+    rng = random.Random(seed)
+    letters = string.ascii_uppercase
+    for i in range(scenarios_number):
+        f.write(json.dumps({
+            'id' : i,
+            'facts' : '=' + ''.join(rng.sample(letters, rng.randrange(6))),
+            'queries' : '?' + ''.join(rng.sample(letters, 5))
+        }) + '\n')
+
+def make_runner(filename, engine):
+    kb = src.parsing.parse(filename)
+    if engine == 'compact':
+        return src.Scenarios.CompactScenarioRunner(
+            src.CompactGraph.CompactGraph.from_kb(kb)
+        )
+    if engine == 'sat':
+        return src.Scenarios.SatScenarioRunner(kb)
+    return src.Scenarios.ScenarioRunner(kb, engine)
+
+def main(scenarios_number, engine):
+    with tempfile.TemporaryDirectory() as directory:
+        rules = os.path.join(directory, 'rules.txt')
+        scenarios = os.path.join(directory, 'scenarios.jsonl')
+        with open(rules, 'w') as f:
+            write_rules(f, 300)
+        with open(scenarios, 'w') as f:
+            write_scenarios(f, scenarios_number)
+        runner = make_runner(rules, engine)
+        jobs = 1
+        reference = None
+        while jobs <= os.cpu_count():
+            output = io.StringIO()
+            start = time.perf_counter()
+            src.Scenarios.run_scenarios(runner, scenarios, output, jobs)
+            duration = time.perf_counter() - start
+            if reference is None:
+                reference = duration
+            print("%3d jobs : %8.1f scenarios/s (speedup %.2f)" % (
+                jobs, scenarios_number / duration, reference / duration
+            ))
+            jobs *= 2
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        sys.argv[2] if len(sys.argv) > 2 else 'forward'
+    )
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+Parsing benchmark : parses single rules of increasing size (complete
+expression trees and left nested chains, every operation parenthesized) and
+prints the parsing throughput, which should stay flat as the rules grow.
+
+usage: python3 -m benchmarks.parsing [max_depth]
+"""
+
+import random
+import string
+import sys
+import time
+import src.parsing
+import src.KnowledgeBase
+
+################################################################################
+#                              Parsing benchmark                               #
+################################################################################
+
+def make_expression(rng, depth):
+
+    """
+    Returns a complete expression tree of the given depth, every operation
+    being parenthesized and some of them negated.
+    """
+
+    if depth == 0:
+        return rng.choice(string.ascii_uppercase)
+    return '%s(%s %s %s)' % (
+        '!' if rng.random() < 0.2 else '',
+        make_expression(rng, depth - 1),
+        rng.choice('+|^'),
+        make_expression(rng, depth - 1)
+    )
+
+def make_nested_expression(rng, depth):
+
+    """
+    Returns a left nested expression of 2 ** depth atoms, like
+    ((A + B) | C) ^ D with every operation parenthesized.
+    """
+
+    expression = rng.choice(string.ascii_uppercase)
+    for i in range(2 ** depth - 1):
+        expression = '(%s %s %s)' % (
+            expression, rng.choice('+|^'), rng.choice(string.ascii_uppercase)
+        )
+    return expression
+
+def make_rule(expression, rng):
+    return '%s => %s' % (expression, rng.choice(string.ascii_uppercase))
+
+def measure(rule, repeat):
+
+    """
+    Returns the mean time parsing rule takes, linking equivalences (which
+    doesn't depend on the parser) is left out.
+    """
+
+    seconds = 0
+    for i in range(repeat):
+        kb = src.KnowledgeBase.KnowledgeBase()
+        kb.deferred_linking = True
+        start = time.perf_counter()
+        src.parsing.parse_rule(rule, kb)
+        seconds += time.perf_counter() - start
+    return seconds / repeat
+
+def main(max_depth):
+    rng = random.Random(0)
+    print("%8s %6s %10s %12s %12s" % (
+        "shape", "depth", "length", "seconds", "chars/s"
+    ))
+    for shape, make_expression_of in (
+            ('tree', make_expression),
+            ('nested', make_nested_expression)
+    ):
+        for depth in range(4, max_depth + 1, 2):
+            rule = make_rule(make_expression_of(rng, depth), rng)
+            repeat = max(1, 2 ** 16 // len(rule))
+            seconds = measure(rule, repeat)
+            print("%8s %6d %10d %12.6f %12d" % (
+                shape, depth, len(rule), seconds, len(rule) / seconds
+            ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark suite : generates rule files of every shape and size (see
+benchmarks.generate), times their parsing, the linking of their equivalences
+and the solving of their queries separately, and prints the best time of
+each phase.
+
+The results can be written to a JSON file, and compared to the ones of a
+previous run to spot regressions (the ratios printed are new time / old
+time).
+
+usage: python3 -m benchmarks.suite [-o OUTPUT] [-b BASELINE] [-r REPEAT]
+                                   [shape ...]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+import src.parsing
+import src.KnowledgeBase
+from benchmarks.generate import shapes, write_rules
+
+################################################################################
+#                               Benchmark suite                                #
+################################################################################
+
+sizes = {
+    'chain' : (100, 400, 1600),
+    'fanin' : (40, 120, 360),
+    'nested' : (6, 8, 10),
+    'equivalence' : (100, 400, 1600),
+    'cyclic' : (100, 400, 1600),
+    'horn' : (100, 400, 1600)
+}
+
+phases = ('parse', 'link', 'solve')
+
+def measure(filename):
+
+    """
+    Parses, links and solves (without explanations) the given rule file and
+    returns the time each phase took, with the number of predicates and
+    results created.
+    """
+
+    kb = src.KnowledgeBase.KnowledgeBase()
+    kb.deferred_linking = True
+    start = time.perf_counter()
+    kb.queries = src.parsing.parse_lines(filename, kb)
+    parsed = time.perf_counter()
+    kb.deferred_linking = False
+    kb.link_pending()
+    linked = time.perf_counter()
+    for query in kb.queries:
+        query.evaluate()
+    solved = time.perf_counter()
+    predicates = kb.list_predicates()
+    return {
+        'parse' : parsed - start,
+        'link' : linked - parsed,
+        'solve' : solved - linked,
+        'predicates' : len(predicates),
+        'results' : sum(len(p.results) for p in predicates)
+    }
+
+def run_benchmark(directory, shape, size, repeat):
+    filename = os.path.join(directory, '%s-%d.txt' % (shape, size))
+    with open(filename, 'w') as f:
+        rules = write_rules(f, shape, size)
+    runs = [measure(filename) for i in range(repeat)]
+    benchmark = {'shape' : shape, 'size' : size, 'rules' : rules}
+    benchmark.update(runs[0])
+    for phase in phases:
+        benchmark[phase] = min(run[phase] for run in runs)
+    return benchmark
+
+def load_baseline(filename):
+
+    """
+    Returns the benchmarks of a JSON file written by a previous run, by
+    (shape, size).
+    """
+
+    with open(filename) as f:
+        return {
+            (b['shape'], b['size']) : b for b in json.load(f)['benchmarks']
+        }
+
+def print_benchmark(benchmark, baseline):
+    line = "%12s %6d %8d %10d" % (
+        benchmark['shape'], benchmark['size'], benchmark['predicates'],
+        benchmark['results']
+    )
+    old = baseline.get((benchmark['shape'], benchmark['size']))
+    for phase in phases:
+        line += " %10.4f" % benchmark[phase]
+        if baseline:
+            line += " %6s" % (
+                "%.2f" % (benchmark[phase] / old[phase]) if old else "-"
+            )
+    print(line, flush=True)
+
+def main(shape_names, repeat, output=None, baseline=None):
+    baseline = load_baseline(baseline) if baseline else {}
+    header = "%12s %6s %8s %10s" % ("shape", "size", "preds", "results")
+    for phase in phases:
+        header += " %10s" % phase
+        if baseline:
+            header += " %6s" % "ratio"
+    print(header)
+    benchmarks = []
+    with tempfile.TemporaryDirectory() as directory:
+        for shape in shape_names:
+            for size in sizes[shape]:
+                benchmarks.append(
+                    run_benchmark(directory, shape, size, repeat)
+                )
+                print_benchmark(benchmarks[-1], baseline)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'date' : datetime.datetime.now().isoformat(),
+                'python' : platform.python_version(),
+                'repeat' : repeat,
+                'benchmarks' : benchmarks
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the solver.')
+    parser.add_argument(
+        'shapes', nargs='*', metavar='shape',
+        help='shapes of the rule files to benchmark among %s (every shape by '
+        'default).' % ', '.join(shapes)
+    )
+    parser.add_argument(
+        '-o', '--output', type=str,
+        help='JSON file to write the results to.'
+    )
+    parser.add_argument(
+        '-b', '--baseline', type=str,
+        help='JSON file written by a previous run to compare the results to.'
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='number of runs of each benchmark (the best time is kept).'
+    )
+    args = parser.parse_args()
+    for shape in args.shapes:
+        if shape not in shapes:
+            parser.error('unknown shape %r' % shape)
+    main(args.shapes or list(shapes), args.repeat, args.output, args.baseline)
@@ -1,17 +1,50 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
+import io
+import os
+import sys
+import unittest
 import src.parsing
+import src.ForwardChaining
+import src.CompactGraph
+import src.KnowledgeBaseFile
+import src.Scenarios
+import src.Parallel
+import src.Solution
+import src.Profiling
+import src.Satisfiability
+import src.Server
+from src.LogicalValues import values
+from src.Exceptions import ParseError, IncoherenceError
 
 ################################################################################
 #                              Command parser                                  #
 ################################################################################
 
+ENGINE_HELP = (
+    'engine used to solve the queries. sat decides them by entailment : a '
+    'query neither entailed nor refuted is UNDETERMINED only if it is an '
+    'atom under a \'|\' or a \'^\' of an entailed conclusion (both A and '
+    'B of C => A | B with C TRUE, where the other engines decide one of '
+    'them), FALSE otherwise.'
+)
+
 def make_parser():
     parser = argparse.ArgumentParser(description='Modelize logic.')
     subparsers = parser.add_subparsers(dest="subcommand")
     subparsers.required = True
     test_subparser = subparsers.add_parser('test')
+    compile_subparser = subparsers.add_parser('compile')
+    compile_subparser.add_argument(
+        'filename', type=str,
+        help='filename containing the instructions to compile.'
+    )
+    compile_subparser.add_argument(
+        'output', type=str,
+        help='filename of the compiled knowledge base to write.'
+    )
     solver_subparser = subparsers.add_parser('run')
     solver_subparser.add_argument(
         '-v', '--verbose', help='enable verbose mode.', action='store_true'
@@ -19,39 +52,304 @@ def make_parser():
     solver_subparser.add_argument(
         '-d', '--debug', help='enable debug mode.', action='store_true'
     )
+    solver_subparser.add_argument(
+        '-e', '--engine', help=ENGINE_HELP,
+        choices=('backward', 'forward', 'compact', 'sat'), default='backward'
+    )
+    solver_subparser.add_argument(
+        '-f', '--format', help=(
+            'output format, json writes the queries and their reasonning as '
+            'a DAG of JSON lines (see src.Solution.DagWriter).'
+        ),
+        choices=('text', 'json'), default='text'
+    )
+    solver_subparser.add_argument(
+        '-p', '--profile', action='store_true', help=(
+            'count the calls of the hot paths and the time spent in them, and '
+            'write the report to stderr at the end of the run, as a table or '
+            'as JSON depending on the format (implies -j 1).'
+        )
+    )
+    solver_subparser.add_argument(
+        '-s', '--scenarios', type=str, metavar='SCENARIOS',
+        help=(
+            'JSON lines file of facts and queries to solve against the rules '
+            '(one output JSON line per scenario).'
+        )
+    )
+    solver_subparser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help=(
+            'number of worker processes solving the scenarios (or the queries '
+            'with the backward engine).'
+        )
+    )
     solver_subparser.add_argument(
         'filename', type=str,
-        help='filename containing the instructions to process.'
+        help=(
+            'filename containing the instructions to process (or compiled '
+            'knowledge base).'
+        )
+    )
+    serve_subparser = subparsers.add_parser('serve')
+    serve_subparser.add_argument(
+        '-e', '--engine', help=ENGINE_HELP,
+        choices=('backward', 'forward', 'compact', 'sat'), default='backward'
+    )
+    serve_subparser.add_argument(
+        '-u', '--unix', type=str, metavar='SOCKET',
+        help='path of the Unix socket to listen on (instead of TCP).'
+    )
+    serve_subparser.add_argument(
+        '--host', type=str, default='127.0.0.1',
+        help='address to listen on.'
+    )
+    serve_subparser.add_argument(
+        '--port', type=int, default=8642, help='TCP port to listen on.'
+    )
+    serve_subparser.add_argument(
+        '-b', '--batch', type=int, default=64,
+        help='maximum number of requests solved in a single batch.'
+    )
+    serve_subparser.add_argument(
+        'filename', type=str,
+        help=(
+            'filename containing the rules to load (or compiled knowledge '
+            'base).'
+        )
     )
     return parser
 
 
-def solve(queries, verbose, debug):
-    for q in queries:
-        solution = q.solve()
-        print(solution.make_display_text(verbose, debug))
+def check_run_arguments(parser, args):
+    """
+    Exits with a usage error if an option of the run subcommand can't be
+    honoured : the compact and sat engines only decide the values of the
+    queries, they don't explain them.
+    """
+
+    if args.engine in ('compact', 'sat'):
+        for given, option in (
+                (args.verbose, '-v/--verbose'),
+                (args.debug, '-d/--debug'),
+                (args.format == 'json', '-f/--format json')
+        ):
+            if given:
+                parser.error('%s is not supported by the %s engine' % (
+                    option, args.engine
+                ))
+
+
+def print_values(states):
+    """
+    Prints the value of each (predicate, value) pair of states, for the
+    engines that don't explain their reasonning.
+    """
+
+    for pred, value in states:
+        print('{pred} is {val}'.format(pred=pred, val=value))
+
+
+def solve_compact(graph):
+    states = graph.solve()
+    print_values(
+        [(graph.expression(q), values[states[q]])
+         for q in graph.queries.tolist()]
+    )
+
+
+def solve_sat(kb):
+    queries = sorted(kb.queries, key=lambda q: q.name)
+    states = src.Satisfiability.SatEngine(kb).solve(queries)
+    print_values([(q, states[q]) for q in queries])
+
+
+def write_query(query, verbose, debug, output):
+    if verbose or debug:
+        query.solve().write_display_text(
+            src.Solution.ExplanationWriter(output), verbose, debug
+        )
+    else:
+        output.write(src.Solution.make_conclusion_text(query.evaluate()))
+    output.write('\n')
+
+
+def write_query_dag(query, verbose, debug, writer):
+    if verbose or debug:
+        solution = query.solve()
+        writer.write_query(query, solution.result, solution)
+    else:
+        writer.write_query(query, query.evaluate())
+
+
+def display_query(context, i):
+    queries, verbose, debug = context
+    output = io.StringIO()
+    write_query(queries[i], verbose, debug, output)
+    return output.getvalue()
+
+
+def solve(kb, verbose, debug, engine='backward', jobs=1, format='text'):
+    if engine == 'forward':
+        src.ForwardChaining.ForwardChainer(
+            kb, explain=verbose or debug, queries=kb.queries
+        ).run()
+        jobs = 1
+    queries = sorted(kb.queries, key=lambda q: q.name)
+    if format == 'json':
+        # shared nodes are written once, so every query uses the same writer.
+        writer = src.Solution.DagWriter(sys.stdout)
+        for query in queries:
+            write_query_dag(query, verbose, debug, writer)
+    elif jobs < 2:
+        # explanations are streamed to stdout as they are written.
+        for query in queries:
+            write_query(query, verbose, debug, sys.stdout)
+    else:
+        for text in src.Parallel.map_in_workers(
+                display_query, (queries, verbose, debug),
+                range(len(queries)), jobs, chunksize=1
+        ):
+            sys.stdout.write(text)
+    if debug and format != 'json':
+        print(kb.memo)
 
         
-def run(filename, verbose, debug):
+def make_scenario_runner(kb, graph, engine, isolated=False):
+    if engine == 'compact':
+        return src.Scenarios.CompactScenarioRunner(
+            graph or src.CompactGraph.CompactGraph.from_kb(kb)
+        )
+    if engine == 'sat':
+        return src.Scenarios.SatScenarioRunner(kb or graph.to_kb())
+    return src.Scenarios.ScenarioRunner(kb or graph.to_kb(), engine, isolated)
+
+
+def load(filename):
+    """
+    Returns the (knowledge base, compact graph) pair of a rule file or of a
+    compiled knowledge base, only one of them being loaded.
+    """
+
+    if src.KnowledgeBaseFile.is_compiled(filename):
+        return None, src.KnowledgeBaseFile.load(filename)
+    return src.parsing.parse(filename), None
+
+
+def run(filename, verbose, debug, engine='backward', scenarios=None,
+        jobs=1, format='text'):
     """
     run() function parses the file to solve and calls the solve function to
-    display the value of que requested predicates and possibly the reasonning.
+    display the value of que requested predicates and possibly the reasonning,
+    as text or as JSON lines (format is 'text' or 'json').
+
+    If a scenarios file is given, the rules are loaded once and every
+    scenario is solved against them instead.
     """
     
-    queries = src.parsing.parse(filename)
-    solve(queries, verbose, debug)
+    kb, graph = load(filename)
+    if scenarios:
+        runner = make_scenario_runner(kb, graph, engine)
+        return src.Scenarios.run_scenarios(runner, scenarios, jobs=jobs)
+    if engine == 'compact':
+        return solve_compact(
+            graph or src.CompactGraph.CompactGraph.from_kb(kb)
+        )
+    if engine == 'sat':
+        return solve_sat(kb or graph.to_kb())
+    solve(kb or graph.to_kb(), verbose, debug, engine, jobs, format)
+
+
+def serve(filename, engine='backward', socket_path=None, host='127.0.0.1',
+          port=8642, max_batch=64):
+    """
+    serve() function loads the rules once and answers the scenarios sent to
+    it (see src.Server) until it is interrupted.
+    """
+
+    kb, graph = load(filename)
+    # each request is solved in its own evaluation context.
+    runner = make_scenario_runner(kb, graph, engine, isolated=True)
+    try:
+        asyncio.run(src.Server.serve(
+            runner, socket_path, host, port, max_batch
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+def test():
+    """
+    test() function runs the tests of the tests directory (every test_*.py
+    module).
+    """
+
+    unittest.main(module=None, argv=sys.argv + [
+        'discover', '-s', os.path.join(os.path.dirname(__file__), 'tests')
+    ])
+
+
+def compile_command(filename, output):
+    """
+    compile_command() function parses the file and writes its linked
+    predicates graph to output, run() can then load it without parsing nor
+    linking.
+    """
+
+    kb = src.parsing.parse(filename)
+    src.KnowledgeBaseFile.dump(src.CompactGraph.CompactGraph.from_kb(kb), output)
         
 
 ################################################################################
 #                                Entrypoint                                    #
 ################################################################################    
     
-if __name__ == '__main__':
+def main():
+    """
+    main() function runs the subcommand of the command line, the errors of
+    the rule file are written to stderr as file:line:column: message.
+    """
+
     parser = make_parser()
     args = parser.parse_args()
+    if args.subcommand == 'run':
+        check_run_arguments(parser, args)
     if args.subcommand == 'test':
         sys.argv = sys.argv[:1:]
-        test()
-    else:
-        run(args.filename, verbose=args.verbose, debug=args.debug)
-        
+        return test()
+    try:
+        if args.subcommand == 'compile':
+            compile_command(args.filename, args.output)
+        elif args.subcommand == 'serve':
+            serve(
+                args.filename, engine=args.engine, socket_path=args.unix,
+                host=args.host, port=args.port, max_batch=args.batch
+            )
+        elif args.profile:
+            # the workers' calls wouldn't be counted.
+            with src.Profiling.Profiler() as profiler:
+                run(
+                    args.filename, verbose=args.verbose, debug=args.debug,
+                    engine=args.engine, scenarios=args.scenarios, jobs=1,
+                    format=args.format
+                )
+            if args.format == 'json':
+                profiler.write_json(sys.stderr)
+            else:
+                profiler.write_table(sys.stderr)
+        else:
+            run(
+                args.filename, verbose=args.verbose, debug=args.debug,
+                engine=args.engine, scenarios=args.scenarios, jobs=args.jobs,
+                format=args.format
+            )
+    except ParseError as e:
+        sys.stdout.flush()
+        sys.exit(e.locate(args.filename))
+    except IncoherenceError:
+        sys.stdout.flush()
+        sys.exit('%s: the facts contradict the rules' % args.filename)
+
+
+if __name__ == '__main__':
+    main()
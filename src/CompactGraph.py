@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+
+import collections
+import itertools
+import numpy
+from src.LogicalValues import T, F, Undefined, values
+from src.Exceptions import IncoherenceError
+import src.Predicates
+import src.Results
+import src.ForwardChaining
+import src.KnowledgeBase
+
+################################################################################
+#                                Compact graph                                 #
+################################################################################
+
+# Predicate kinds, indexed by their code in CompactGraph.kinds.
+predicate_classes = (
+    src.Predicates.AtomicPredicate,
+    src.Predicates.NotPredicate,
+    src.Predicates.AndPredicate,
+    src.Predicates.OrPredicate,
+    src.Predicates.XorPredicate
+)
+
+ATOMIC, NOT = 0, 1
+
+# Result kinds, indexed by their code in CompactGraph.result_kinds.
+result_classes = (
+    src.Results.DefinedResult,
+    src.Results.DefinedEquivalenceResult,
+    src.Results.DeducedEquivalenceResult,
+    src.Results.ImplicationResult,
+    src.Results.IndirectImplicationResult,
+    src.Results.NotParentResult,
+    src.Results.AndParentResult,
+    src.Results.OrParentResult,
+    src.Results.XorParentResult,
+    src.Results.ChildResult
+)
+
+(DEFINED, DEFINED_EQUIVALENCE, DEDUCED_EQUIVALENCE, IMPLICATION,
+ INDIRECT_IMPLICATION, NOT_PARENT, AND_PARENT, OR_PARENT, XOR_PARENT,
+ CHILD) = range(len(result_classes))
+
+# Parent result kind for each predicate kind containing the predicate.
+parent_result_kinds = (None, NOT_PARENT, AND_PARENT, OR_PARENT, XOR_PARENT)
+
+# Role of each result kind in the propagation (see src.ForwardChaining).
+result_roles = tuple(
+    src.ForwardChaining.result_roles[cls] for cls in result_classes
+)
+
+# Code standing for "no twin predicates" in the parent results tables, and
+# code returned by these tables for error cases.
+NO_TWIN = len(values)
+ERROR = 255
+
+############################### Lookup tables ##################################
+
+def make_unary_table(table):
+    return tuple(table[v].code for v in values)
+
+def make_parent_table(cls):
+    table = []
+    for src_value in values:
+        for twin_value in values + (None,):
+            key = (src_value, twin_value)
+            if key in cls.error_cases:
+                table.append(ERROR)
+            else:
+                table.append(cls.conv_table.get(key, Undefined).code)
+    return tuple(table)
+
+def make_child_table(cls):
+    if cls is src.Predicates.NotPredicate:
+        return make_unary_table(cls.values_table)
+    return tuple(
+        cls.values_table[(v1, v2)].code for v1 in values for v2 in values
+    )
+
+implication_table = make_unary_table(src.Results.ImplicationResult.values)
+indirect_implication_table = make_unary_table(
+    src.Results.IndirectImplicationResult.values
+)
+not_parent_table = make_unary_table(
+    src.Results.NotParentResult.conversion_table
+)
+parent_tables = {
+    kind : make_parent_table(result_classes[kind])
+    for kind in (AND_PARENT, OR_PARENT, XOR_PARENT)
+}
+child_tables = tuple(
+    None if cls is src.Predicates.AtomicPredicate else make_child_table(cls)
+    for cls in predicate_classes
+)
+
+
+############################# Adjacency lists ##################################
+
+class Adjacency:
+
+    """
+    Compressed sparse row adjacency lists : the neighbours of node i are
+    targets[offsets[i]:offsets[i + 1]].
+    """
+
+    __slots__ = ('offsets', 'targets')
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_lists(cls, lists):
+        offsets = numpy.zeros(len(lists) + 1, dtype=numpy.int32)
+        numpy.cumsum([len(l) for l in lists], out=offsets[1:])
+        targets = numpy.fromiter(
+            itertools.chain.from_iterable(lists),
+            dtype=numpy.int32,
+            count=int(offsets[-1])
+        )
+        return cls(offsets, targets)
+
+    def __getitem__(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def get(self, i, default=None):
+        """
+        Returns the neighbours of node i as a list (the dependents mapping
+        of src.ForwardChaining.Propagator).
+        """
+
+        return self.targets[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+############################## Flyweight results ###############################
+
+class CompactResult:
+
+    """
+    Flyweight view on a result of a CompactGraph, the result itself is only
+    a row of the graph's result arrays.
+    """
+
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    @property
+    def kind(self):
+        return result_classes[self.graph.result_kinds[self.index]]
+
+    @property
+    def pred(self):
+        return int(self.graph.result_preds[self.index])
+
+    def sources(self):
+        return self.graph.result_sources(self.index)
+
+    def value_from_states(self, states):
+        return values[self.graph.result_value(self.index, states)]
+
+    def __str__(self):
+        graph = self.graph
+        return "{kind} for {pred} from {srcs}".format(
+            kind=self.kind.__name__,
+            pred=graph.expression(self.pred),
+            srcs=', '.join(graph.expression(s) for s in self.sources())
+            or 'facts'
+        )
+
+
+################################ Compact graph #################################
+
+class CompactGraph:
+
+    """
+    Compact representation of a knowledge base : predicates are interned to
+    integer ids, relations are stored in CSR adjacency lists and results in
+    flat arrays (see CompactResult), instead of sets, entities and result
+    objects hanging off every predicate.
+
+    It can be solved on its own (see solve()), without explanations.
+    """
+
+    def __init__(self, kinds, names, childs, implies, defined_eqs, entities,
+                 facts, queries):
+
+        """
+        kinds holds the predicate kind codes (see predicate_classes), names
+        the ASCII codes of the atomic predicates names (0 for other kinds),
+        entities the entity id of every predicate, facts and queries the ids
+        of the atomic predicates defined as TRUE and queried.
+
+        The other relations (implied_by, contained_by, entity members) are
+        deduced from the given ones.
+        """
+
+        self.kinds = kinds
+        self.names = names
+        self.childs = childs
+        self.implies = implies
+        self.defined_eqs = defined_eqs
+        self.entities = entities
+        self.facts = facts
+        self.queries = queries
+        size = len(kinds)
+        self.implied_by = self.reverse(implies, size)
+        self.contained_by = self.reverse(childs, size)
+        members = [[] for _ in range(int(entities.max(initial=-1)) + 1)]
+        for p, e in enumerate(entities.tolist()):
+            members[e].append(p)
+        self.members = Adjacency.from_lists(members)
+        self.make_results()
+
+    @classmethod
+    def from_kb(cls, kb):
+
+        """
+        Builds the compact graph of a knowledge base.
+        """
+
+        # numbered in creation order, so to_kb() creates them in the same
+        # order and sorts the operands the same way.
+        preds = sorted(kb.list_predicates(), key=lambda p: p.id)
+        ids = {p : i for i, p in enumerate(preds)}
+        entities = {}
+        return cls(
+            kinds=numpy.array(
+                [predicate_classes.index(type(p)) for p in preds],
+                dtype=numpy.uint8
+            ),
+            names=numpy.array(
+                [
+                    ord(p.name)
+                    if isinstance(p, src.Predicates.AtomicPredicate) else 0
+                    for p in preds
+                ],
+                dtype=numpy.uint8
+            ),
+            childs=Adjacency.from_lists(
+                [[ids[c] for c in p.list_childs()] for p in preds]
+            ),
+            implies=Adjacency.from_lists(
+                [[ids[c] for c in p.self_implies] for p in preds]
+            ),
+            defined_eqs=Adjacency.from_lists(
+                [[ids[c] for c in p.defined_eqs] for p in preds]
+            ),
+            entities=numpy.array(
+                [entities.setdefault(p.entity, len(entities)) for p in preds],
+                dtype=numpy.int32
+            ),
+            facts=numpy.array(
+                sorted(ids[p] for p in kb.facts), dtype=numpy.int32
+            ),
+            queries=numpy.array(
+                sorted(ids[p] for p in kb.queries), dtype=numpy.int32
+            )
+        )
+
+    def to_kb(self):
+
+        """
+        Rebuilds the knowledge base the graph was made from.
+
+        Entities are restored from the graph, so predicates aren't linked to
+        their equivalents (no signature is computed).
+        """
+
+        kb = src.KnowledgeBase.KnowledgeBase()
+        # Linking is deferred then dropped, the predicates are still interned.
+        kb.deferred_linking = True
+        preds = [None] * len(self)
+        def build(p):
+            if preds[p] is None:
+                cls = predicate_classes[self.kinds[p]]
+                if cls is src.Predicates.AtomicPredicate:
+                    preds[p] = cls(chr(self.names[p]), kb=kb)
+                else:
+                    preds[p] = cls(
+                        *[build(c) for c in self.childs[p].tolist()], kb=kb
+                    )
+            return preds[p]
+        for p in range(len(self)):
+            build(p)
+        kb.pending = []
+        kb.deferred_linking = False
+        for e in range(len(self.members)):
+            members = [preds[p] for p in self.members[e].tolist()]
+            for p in members[1:]:
+                members[0].entity.merge(p.entity)
+        for p in range(len(self)):
+            preds[p].self_implies.update(
+                preds[q] for q in self.implies[p].tolist()
+            )
+            preds[p].is_implied_by.update(
+                preds[q] for q in self.implied_by[p].tolist()
+            )
+            preds[p].defined_eqs.update(
+                preds[q] for q in self.defined_eqs[p].tolist()
+            )
+        for p in self.facts.tolist():
+            preds[p].set_initial_state()
+        kb.queries = {preds[p] for p in self.queries.tolist()}
+        return kb
+
+    @staticmethod
+    def reverse(adjacency, size):
+        lists = [[] for _ in range(size)]
+        for i in range(size):
+            for j in adjacency[i].tolist():
+                lists[j].append(i)
+        return Adjacency.from_lists(lists)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def make_results(self):
+
+        """
+        Builds the result arrays (the same results Predicate.make_results()
+        would build for every predicate) and the dependents adjacency lists
+        (ids of the results computed from each predicate, but the dead ones,
+        see Propagator.find_dead_results()).
+        """
+
+        kinds, preds, srcs = [], [], []
+        def add(kind, pred, srcpred=-1):
+            kinds.append(kind)
+            preds.append(pred)
+            srcs.append(srcpred)
+        for p in self.facts.tolist():
+            add(DEFINED, p)
+        for p in range(len(self)):
+            defined_eqs = set(self.defined_eqs[p].tolist())
+            for q in self.members[self.entities[p]].tolist():
+                if q != p:
+                    add(
+                        DEFINED_EQUIVALENCE if q in defined_eqs
+                        else DEDUCED_EQUIVALENCE,
+                        p, q
+                    )
+            for q in self.implied_by[p].tolist():
+                add(IMPLICATION, p, q)
+            for q in self.implies[p].tolist():
+                add(INDIRECT_IMPLICATION, p, q)
+            for q in self.contained_by[p].tolist():
+                add(parent_result_kinds[self.kinds[q]], p, q)
+            if self.kinds[p] != ATOMIC:
+                add(CHILD, p)
+        self.result_kinds = numpy.array(kinds, dtype=numpy.uint8)
+        self.result_preds = numpy.array(preds, dtype=numpy.int32)
+        self.result_srcs = numpy.array(srcs, dtype=numpy.int32)
+        dead = CompactPropagator(self).find_dead_results(range(len(kinds)))
+        dependents = [[] for _ in range(len(self))]
+        for r in range(len(kinds)):
+            if r in dead:
+                continue
+            for s in self.result_sources(r):
+                dependents[s].append(r)
+        self.dependents = Adjacency.from_lists(dependents)
+
+    def get_result(self, r):
+        return CompactResult(self, r)
+
+    def result_twins(self, r):
+
+        """
+        Returns the ids of the operands of the parent result r's source
+        predicate, but its predicate (see ParentResult.twinpreds).
+        """
+
+        pred = int(self.result_preds[r])
+        twins = self.childs[self.result_srcs[r]].tolist()
+        twins.remove(pred)
+        if all(p == pred for p in twins):
+            return []
+        return twins
+
+    def fold(self, kind, preds, states):
+
+        """
+        Returns the state code of the predicate kind's operator applied to
+        the given predicates (see ParentPredicate.fold_states()), NO_TWIN if
+        there is none.
+        """
+
+        if not preds:
+            return NO_TWIN
+        table = child_tables[kind]
+        state = states[preds[0]]
+        for p in preds[1:]:
+            state = table[state * len(values) + states[p]]
+        return state
+
+    def result_sources(self, r):
+
+        """
+        Returns the ids of the predicates the result r is computed from.
+        """
+
+        kind = self.result_kinds[r]
+        if kind == DEFINED:
+            return ()
+        if kind == CHILD:
+            return self.childs[self.result_preds[r]].tolist()
+        if kind in parent_tables:
+            return [int(self.result_srcs[r])] + self.result_twins(r)
+        return (int(self.result_srcs[r]),)
+
+    def result_value(self, r, states):
+
+        """
+        Returns the value code of the result r given the state codes of the
+        predicates (see Result.value_from_states()).
+        """
+
+        kind = self.result_kinds[r]
+        srcpred = self.result_srcs[r]
+        if kind == DEFINED:
+            return T.code
+        if kind == DEFINED_EQUIVALENCE or kind == DEDUCED_EQUIVALENCE:
+            return states[srcpred]
+        if kind == IMPLICATION:
+            return implication_table[states[srcpred]]
+        if kind == INDIRECT_IMPLICATION:
+            return indirect_implication_table[states[srcpred]]
+        if kind == NOT_PARENT:
+            return not_parent_table[states[srcpred]]
+        if kind == CHILD:
+            pred = self.result_preds[r]
+            childs = self.childs[pred].tolist()
+            if self.kinds[pred] == NOT:
+                return child_tables[NOT][states[childs[0]]]
+            return self.fold(self.kinds[pred], childs, states)
+        twins_state = self.fold(
+            self.kinds[srcpred], self.result_twins(r), states
+        )
+        value = parent_tables[kind][
+            states[srcpred] * (len(values) + 1) + twins_state
+        ]
+        if value == ERROR:
+            raise IncoherenceError
+        return value
+
+    def solve(self, facts=None):
+
+        """
+        Computes the state of every predicate the same way ForwardChainer
+        does (see CompactPropagator), and returns a bytearray of state codes indexed by predicate id.
+
+        facts are the ids of the atomic predicates defined as TRUE, the
+        graph's facts are used if it isn't given.
+        """
+
+        if facts is None:
+            facts = self.facts.tolist()
+        propagator = CompactPropagator(self)
+        agenda = collections.deque()
+        for p in facts:
+            if propagator.states[p] != T.code:
+                propagator.decide(p, None, T.code)
+                agenda.append(p)
+        propagator.reach_fixpoint(
+            numpy.flatnonzero(self.kinds == ATOMIC).tolist(),
+            agenda,
+            self.dependents
+        )
+        return propagator.states
+
+    def follows_rule(self, r, states):
+
+        """
+        Returns True if the result r deduces its predicate in the direction
+        of the rules (see Result.follows_rule()).
+        """
+
+        kind = self.result_kinds[r]
+        if kind == IMPLICATION or kind == DEFINED_EQUIVALENCE:
+            return True
+        srcstate = states[self.result_srcs[r]]
+        if kind == NOT_PARENT:
+            return not_parent_table[srcstate] == T.code
+        if kind in parent_tables:
+            return parent_tables[kind][
+                srcstate * (len(values) + 1) + F.code
+            ] == T.code
+        return False
+
+    def atom_ids(self):
+
+        """
+        Returns a dict mapping the atomic predicates names to their ids.
+        """
+
+        return {
+            chr(self.names[p]) : p
+            for p in numpy.flatnonzero(self.kinds == ATOMIC).tolist()
+        }
+
+    def expression(self, p):
+
+        """
+        Returns the text of the predicate p (see Predicate.__str__()).
+        """
+
+        kind = self.kinds[p]
+        if kind == ATOMIC:
+            return chr(self.names[p])
+        texts = []
+        for c in self.childs[p].tolist():
+            if self.kinds[c] in (ATOMIC, NOT):
+                texts.append(self.expression(c))
+            else:
+                texts.append("(%s)" % self.expression(c))
+        if kind == NOT:
+            return "!%s" % texts[0]
+        return (" %s " % predicate_classes[kind].op).join(texts)
+
+
+class CompactPropagator(src.ForwardChaining.Propagator):
+
+    """
+    Propagator of the states of the predicates of a CompactGraph, the
+    predicates and the results being their ids, and the states a bytearray
+    of value codes indexed by predicate id.
+    """
+
+    def __init__(self, graph):
+        super().__init__()
+        self.graph = graph
+        self.states = bytearray([Undefined.code]) * len(graph)
+        self.kinds = graph.kinds.tolist()
+        self.names = graph.names.tolist()
+        self.result_kinds = graph.result_kinds.tolist()
+        self.result_preds = graph.result_preds.tolist()
+        self.result_srcs = graph.result_srcs.tolist()
+
+    def state(self, pred):
+        return self.states[pred]
+
+    def result_value(self, r):
+        return self.graph.result_value(r, self.states)
+
+    def result_pred(self, r):
+        return self.result_preds[r]
+
+    def result_role(self, r):
+        return result_roles[self.result_kinds[r]]
+
+    def result_source(self, r):
+        source = self.result_srcs[r]
+        return source if source >= 0 else None
+
+    def follows_rule(self, r):
+        return self.graph.follows_rule(r, self.states)
+
+    def is_atom(self, pred):
+        return self.kinds[pred] == ATOMIC
+
+    def atom_name(self, atom):
+        return self.names[atom]
+
+    def decide(self, pred, result, value):
+        self.states[pred] = value
+
+
+if __name__ == '__main__':
+    pass
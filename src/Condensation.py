@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+import collections
+from src.LogicalValues import T, F
+from src.Exceptions import IncoherenceError
+import src.Predicates
+import src.Results
+import src.ForwardChaining
+
+################################################################################
+#                       Strongly connected components                          #
+################################################################################
+
+def strongly_connected_components(root, successors):
+
+    """
+    Yields the strongly connected components (lists of nodes) of the graph
+    reachable from root, successors(node) returning the nodes a node points
+    to.
+
+    This is Tarjan's algorithm with an explicit stack (no recursion), each
+    component is yielded after every component it points to, so the
+    condensation DAG is walked in reverse topological order.
+    """
+
+    index = {root : 0}
+    lowlink = {root : 0}
+    stack = [root]
+    on_stack = {root}
+    work = [(root, iter(successors(root)))]
+    while work:
+        node, successors_left = work[-1]
+        for successor in successors_left:
+            if successor not in index:
+                index[successor] = lowlink[successor] = len(index)
+                stack.append(successor)
+                on_stack.add(successor)
+                work.append((successor, iter(successors(successor))))
+                break
+            elif successor in on_stack:
+                lowlink[node] = min(lowlink[node], index[successor])
+        else:
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member is node:
+                        break
+                yield component
+
+
+################################################################################
+#                            Topological solving                               #
+################################################################################
+
+class TopologicalSolver(src.ForwardChaining.ResultPropagator):
+
+    """
+    Solves a predicate and every predicate its state depends on, without
+    recursion nor cycle breaking flags.
+
+    A predicate depends on the sources of its results. The strongly connected
+    components of these dependencies are solved in topological order, so
+    when a component is solved, every predicate it depends on outside of it
+    already has its final solution. Inside a component, results are applied
+    until a fixpoint is reached (see ForwardChainer), then atomic predicates
+    left Undefined take their default value (FALSE, see
+    Propagator.reach_fixpoint()).
+
+    The predicates and their results are walked in an order only depending
+    on the rules, so the reasonnings don't depend on the memory layout.
+
+    The facts are the ones of the given evaluation context (see
+    src.Context), the DefinedResults of the predicates are ignored. The
+    decisions (and solutions if explain is True) are stored in its solutions
+    memo, solved predicates are never visited again until it is
+    invalidated. Explaining predicates already solved without explanations
+    solves them again.
+    """
+
+    def __init__(self, context, explain=False):
+        super().__init__(context, explain)
+        self.kb = context.kb
+        self.memo = context.memo
+        self.facts = context.facts
+        # predicates considered solved
+        self.solved = self.decisions if self.solutions is None else (
+            self.solutions
+        )
+        self.dead = self.kb.get_dead_results()
+
+    def dependencies(self, pred):
+        if pred in self.solved:
+            return ()
+        if not pred.results_built:
+            pred.make_results()
+        return sorted(
+            {s for r in pred.results if r not in self.dead
+             for s in r.sources()},
+            key=lambda p: p.id
+        )
+
+    def solve(self, pred):
+
+        """
+        Stores the decision (and solution) of pred and of the predicates it
+        depends on in the solutions memo.
+
+        Without explanations, the decisions of the Horn part of the knowledge
+        base are computed first (see src.Horn), so the predicates it depends
+        on there are already solved.
+
+        The memo is invalidated if the facts are incoherent, so no partial
+        decision is left in it.
+        """
+
+        try:
+            if self.solutions is None and not self.memo.seeded:
+                self.kb.get_horn_index().seed(self.context)
+            for component in strongly_connected_components(
+                    pred, self.dependencies
+            ):
+                if component[0] not in self.solved:
+                    self.solve_component(component)
+        except IncoherenceError:
+            self.memo.invalidate()
+            raise
+
+    def solve_component(self, component):
+        for p in component:
+            self.decisions.pop(p, None)
+        members = set(component)
+        dependents = {}
+        agenda = collections.deque()
+        for p in component:
+            if p in self.facts:
+                self.apply(src.Results.DefinedResult(p, T), agenda)
+        for p in component:
+            for r in src.Results.sort_results(p.results):
+                if (isinstance(r, src.Results.DefinedResult)
+                    or r in self.dead):
+                    continue
+                for s in r.sources():
+                    if s in members:
+                        dependents.setdefault(s, []).append(r)
+                self.apply(r, agenda)
+        atoms = [
+            p for p in component
+            if isinstance(p, src.Predicates.AtomicPredicate)
+        ]
+        self.reach_fixpoint(atoms, agenda, dependents)
+        for p in component:
+            if p not in self.decisions:
+                self.decide(p, None, F.code)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import src.Memo
+import src.Condensation
+
+################################################################################
+#                             Evaluation contexts                              #
+################################################################################
+
+class EvaluationContext:
+
+    """
+    State of the evaluations of queries against a knowledge base : the facts
+    they assume and the solutions memo of the predicates solved from them.
+
+    Solving only reads the predicates and their results (the decided results
+    are copies holding their value, see Result.bind()), so once every result
+    is built (see KnowledgeBase.build_results()), several contexts can
+    evaluate queries against the same knowledge base concurrently, in
+    threads or tasks, each context being used by one of them at a time.
+
+    The knowledge base's own context (KnowledgeBase.context) uses its facts
+    and memo, Predicate.evaluate() and Predicate.solve() use it by default.
+    """
+
+    def __init__(self, kb, facts=None, memo=None):
+
+        """
+        facts is an iterable of atomic predicates of kb (the facts of kb if
+        it is None).
+        """
+
+        self.kb = kb
+        self.own_facts = None if facts is None else frozenset(facts)
+        self.memo = src.Memo.SolutionMemo() if memo is None else memo
+
+    @property
+    def facts(self):
+        return self.kb.facts if self.own_facts is None else self.own_facts
+
+    def set_facts(self, facts):
+
+        """
+        Replaces the facts of the context by the given atomic predicates, only
+        the decisions depending on the ones asserted or retracted are
+        forgotten (see KnowledgeBase.invalidate_cone()).
+        """
+
+        facts = frozenset(facts)
+        changed = sorted(self.facts ^ facts, key=lambda p: p.id)
+        self.own_facts = facts
+        for pred in changed:
+            self.kb.invalidate_cone(pred, self)
+
+    def evaluate(self, pred):
+
+        """
+        Returns the result the state of pred is deduced from in this context
+        (its value attribute is the state), without building the reasonning.
+        """
+
+        decision = self.memo.get_decision(pred)
+        if decision is None:
+            src.Condensation.TopologicalSolver(self).solve(pred)
+            decision = self.memo.decisions[pred]
+        return decision
+
+    def solve(self, pred):
+
+        """
+        Returns the solution (see src.Solution) of pred in this context.
+        """
+
+        solution = self.memo.get(pred)
+        if solution is None:
+            src.Condensation.TopologicalSolver(self, explain=True).solve(pred)
+            solution = self.memo.solutions[pred]
+        return solution
+
+
+if __name__ == '__main__':
+    pass
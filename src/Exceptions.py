@@ -1,13 +1,56 @@
 #!/usr/bin/env python3
 
-def IncoherenceError(Exception):
+class IncoherenceError(Exception):
 
-    def __init__(self, solution1, solution2):
+    def __init__(self, solution1=None, solution2=None):
+        super().__init__()
         self.solution1 = solution1
         self.solution2 = solution2
 
     def display(self, verbose=False, debug=False):
         pass
 
+class CompiledFileError(Exception):
+
+    """
+    Raised when a compiled knowledge base file can't be loaded.
+    """
+
+    pass
+
+class ParseError(Exception):
+
+    """
+    Raised when a rule file can't be parsed, line and column (starting at 1)
+    locate the error when they are known.
+    """
+
+    def __init__(self, message, line=None, column=None):
+        self.message = message
+        self.line = line
+        self.column = column
+        super().__init__(str(self))
+
+    def __str__(self):
+        if self.line is None:
+            return self.message
+        if self.column is None:
+            return "line {}: {}".format(self.line, self.message)
+        return "line {}, column {}: {}".format(
+            self.line, self.column, self.message
+        )
+
+    def locate(self, filename):
+
+        """
+        Returns the message prefixed with the location of the error in the
+        given file, as file:line:column: message.
+        """
+
+        location = [filename] + [
+            str(n) for n in (self.line, self.column) if n is not None
+        ]
+        return "{}: {}".format(':'.join(location), self.message)
+
 if __name__ == '__main__':
     pass
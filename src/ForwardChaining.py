@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+
+import collections
+from src.LogicalValues import F, U, Undefined, values
+from src.Exceptions import IncoherenceError
+import src.Predicates
+import src.Results
+import src.Solution
+
+################################################################################
+#                              Forward chaining                                #
+################################################################################
+
+# How much a value tells about a predicate, indexed by the value codes : a
+# predicate's state can only be replaced by a more informative one.
+ranks = (2, 2, 1, 0)
+
+
+# Roles of the results in the propagation (see Propagator.result_role()).
+(FACT, CHILD, PARENT, IMPLICATION, CONTRAPOSITIVE, DEFINED_EQUIVALENCE,
+ DEDUCED_EQUIVALENCE) = range(7)
+
+result_roles = {
+    src.Results.DefinedResult : FACT,
+    src.Results.DefaultResult : FACT,
+    src.Results.ChildResult : CHILD,
+    src.Results.NotParentResult : PARENT,
+    src.Results.AndParentResult : PARENT,
+    src.Results.OrParentResult : PARENT,
+    src.Results.XorParentResult : PARENT,
+    src.Results.ImplicationResult : IMPLICATION,
+    src.Results.IndirectImplicationResult : CONTRAPOSITIVE,
+    src.Results.DefinedEquivalenceResult : DEFINED_EQUIVALENCE,
+    src.Results.DeducedEquivalenceResult : DEDUCED_EQUIVALENCE
+}
+
+
+def choose_defaults(atoms, waits, links, name):
+
+    """
+    Returns the atoms (left Undefined) that must take their default value
+    now, as a list of phases (lists of atoms), given the pairs of atoms
+    (a, b) where a still waits for b (waits) and the pairs of atoms sharing
+    an Undefined operation (links), name returning the name of an atom. An
+    empty list is returned if there is none.
+
+    The atoms linked together form groups whose default values are taken
+    together (e.g. the operands of a conjunction), so none is deduced from
+    the others : the atoms of the groups where no atom waits are returned.
+    If every group waits, the group of the first atom by name among the
+    groups only waiting for groups waiting for them in turn (directly or
+    not) is returned, so the groups other ones wait for come first. Its
+    atoms that don't wait are returned first (A of !A => B and A + B => C),
+    the others being left to the TRUE and FALSE values deduced from them.
+
+    The propagation reaches its fixpoint before the next defaults are
+    chosen, so an atom still deduced from others never clashes with its own
+    default value.
+    """
+
+    groups = {atom : atom for atom in atoms}
+
+    def group(atom):
+        while groups[atom] != atom:
+            atom = groups[atom]
+        return atom
+
+    for a, b in links:
+        groups[group(a)] = group(b)
+    awaited = {}
+    for a, b in waits:
+        awaited.setdefault(group(a), set()).add(group(b))
+    ready = [p for p in atoms if group(p) not in awaited]
+    if ready or not atoms:
+        return [ready] if ready else []
+
+    def reachable(g):
+        seen = set(awaited[g])
+        stack = list(seen)
+        while stack:
+            for h in awaited[stack.pop()] - seen:
+                seen.add(h)
+                stack.append(h)
+        return seen
+
+    reach = {g : reachable(g) for g in awaited}
+    first = group(min(
+        (p for p in atoms
+         if all(group(p) in reach[g] for g in reach[group(p)])),
+        key=name
+    ))
+    members = [p for p in atoms if group(p) == first]
+    waiting = {a for a, b in waits}
+    ready = [p for p in members if p not in waiting]
+    if not ready:
+        return [members]
+    return [ready, [p for p in members if p in waiting]]
+
+
+class Propagator:
+
+    """
+    Base class of the engines improving the states of predicates by applying
+    their results (see apply()), taking the default value of the atoms left
+    Undefined once nothing is left to apply (see reach_fixpoint()).
+
+    It only handles value codes (see src.LogicalValues), the predicates and
+    the results being whatever the subclass stores them as (objects, see
+    ResultPropagator, or ids in the arrays of a src.CompactGraph), the
+    subclasses implement the methods raising NotImplementedError.
+
+    UNDETERMINED values are only decided once no TRUE or FALSE value is left
+    to propagate : a state deduced from an UNDETERMINED one may not improve
+    with it (e.g. the conclusion of an implication whose premise goes from
+    UNDETERMINED to FALSE), so the fixpoint would depend on the order the
+    results are applied in.
+
+    A parent predicate whose state was computed from its operands only
+    (derived, see derives()) tells nothing new about them : its parent
+    results aren't applied (e.g. A of C | A, TRUE since C is, would be
+    UNDETERMINED), until a rule or another predicate supports the same state
+    (see apply()).
+
+    The dependents given to the methods map predicates to the results
+    computed from them (dependents.get(pred, ()) is used).
+    """
+
+    def __init__(self):
+        self.undetermined = collections.deque()
+        # predicates whose state was computed from their operands only.
+        self.derived = set()
+
+    def state(self, pred):
+        """
+        This method must return the value code of pred's state (Undefined's
+        if it has none).
+        """
+        raise NotImplementedError
+
+    def result_value(self, result):
+        """
+        This method must return the value code of the result given the
+        current states (see Result.value_from_states()).
+        """
+        raise NotImplementedError
+
+    def result_pred(self, result):
+        """
+        This method must return the predicate the result is a value of.
+        """
+        raise NotImplementedError
+
+    def result_role(self, result):
+        """
+        This method must return the role of the result (see result_roles).
+        """
+        raise NotImplementedError
+
+    def result_source(self, result):
+        """
+        This method must return the predicate the result is computed from
+        (its parent for the parent results), None for the facts and the
+        child results.
+        """
+        raise NotImplementedError
+
+    def follows_rule(self, result):
+        """
+        This method must return True if the result deduces its predicate in
+        the direction of the rules, given the current states (see
+        Result.follows_rule()).
+        """
+        raise NotImplementedError
+
+    def is_atom(self, pred):
+        raise NotImplementedError
+
+    def atom_name(self, atom):
+        raise NotImplementedError
+
+    def derives(self, result):
+        """
+        Returns True if the result only computes its predicate from its
+        operands, directly or through an equivalent predicate.
+        """
+
+        role = self.result_role(result)
+        return role == CHILD or (
+            role == DEDUCED_EQUIVALENCE
+            and self.result_source(result) in self.derived
+        )
+
+    def is_circular(self, result):
+        """
+        Returns True if the result is a parent result computed from a
+        derived parent, which isn't applied.
+        """
+
+        return (
+            self.result_role(result) == PARENT
+            and self.result_source(result) in self.derived
+        )
+
+    def find_dead_results(self, results):
+
+        """
+        Returns the set of the given results that can't change the state of
+        their predicate whatever the facts, which the engines neither apply
+        nor follow (nor take as dependencies, see src.Condensation) :
+        - the parent results of a parent predicate nothing supports : no
+          rule, atom or supported parent gives it a state, directly or
+          through its equivalents, so it is always derived (see derives()).
+        - the contrapositive results (P of P => C) of a conclusion nothing
+          refutes : only its default value or P can make it FALSE or
+          UNDETERMINED, and it waits for the atoms of P before taking its
+          default value (see next_defaults()), so P is already solved.
+
+        The results of the predicates related to theirs must be given too
+        (see Predicate.list_related()).
+        """
+
+        results = [
+            (r, self.result_role(r), self.result_pred(r), self.result_source(r))
+            for r in results
+        ]
+        premises = collections.Counter(
+            pred for r, role, pred, source in results if role == IMPLICATION
+        )
+        supported = set()
+        refuted = {pred for pred, count in premises.items() if count > 1}
+        changed = True
+        while changed:
+            changed = False
+            for r, role, pred, source in results:
+                if pred not in supported and (
+                        self.is_atom(pred)
+                        or role == IMPLICATION
+                        or role == DEFINED_EQUIVALENCE
+                        or role == CONTRAPOSITIVE and source in refuted
+                        or role == DEDUCED_EQUIVALENCE and source in supported
+                        or role == PARENT and source in supported):
+                    supported.add(pred)
+                    changed = True
+                if pred not in refuted and (
+                        role == CHILD
+                        or role == CONTRAPOSITIVE and source in refuted
+                        or role == DEFINED_EQUIVALENCE and source in refuted
+                        or role == DEDUCED_EQUIVALENCE and source in refuted
+                        or role == PARENT and source in supported):
+                    refuted.add(pred)
+                    changed = True
+        return {
+            r for r, role, pred, source in results
+            if role == PARENT and source not in supported
+            or role == CONTRAPOSITIVE and source not in refuted
+        }
+
+    def decide(self, pred, result, value):
+        """
+        This method must set the state of pred to the value code, deduced
+        from the result (None for the default value of an atom).
+        """
+        raise NotImplementedError
+
+    def contradict(self, pred, result, value):
+        """
+        Called when the result's value contradicts pred's state.
+        """
+        raise IncoherenceError
+
+    def apply(self, result, agenda, undetermined=False):
+
+        """
+        Computes the result's value from the current states and updates its
+        predicate's decision if the value is more informative, queuing the
+        predicate in agenda.
+
+        Unless undetermined is True, a result whose value is UNDETERMINED
+        is queued in self.undetermined instead, to be applied again once
+        agenda is empty (see propagate()).
+
+        A derived state (see derives()) is replaced by a result giving the
+        same value otherwise, and its predicate queued again, so the parent
+        results it was keeping back are applied whatever the order the
+        results are applied in.
+        """
+
+        if self.is_circular(result):
+            return
+        value = self.result_value(result)
+        pred = self.result_pred(result)
+        state = self.state(pred)
+        if ranks[value] <= ranks[state]:
+            if ranks[value] == 2 and value != state:
+                self.contradict(pred, result, value)
+            elif (value == state and pred in self.derived
+                  and not self.derives(result)):
+                self.derived.remove(pred)
+                self.decide(pred, result, value)
+                agenda.append(pred)
+            return
+        if value == U.code and not undetermined:
+            self.undetermined.append(result)
+            return
+        if self.derives(result):
+            self.derived.add(pred)
+        else:
+            self.derived.discard(pred)
+        self.decide(pred, result, value)
+        agenda.append(pred)
+
+    def next_defaults(self, atoms, dependents):
+
+        """
+        Returns the phases of atomic predicates among atoms (left Undefined)
+        that must take their default value now, an empty list if there is
+        none (see choose_defaults()).
+
+        An atom waits for the Undefined atoms it may still be deduced from
+        in the direction of the rules (see follows_rule(), the contrapositive
+        and circular results are ignored), and it is linked to the atoms it shares an
+        Undefined operation with.
+        """
+
+        undefined = Undefined.code
+        atoms = [p for p in atoms if self.state(p) == undefined]
+        waits = []
+        links = []
+        for atom in atoms:
+            seen = {(atom, False)}
+            stack = [(atom, False)]
+            while stack:
+                pred, ruled = stack.pop()
+                for r in dependents.get(pred, ()):
+                    step = self.result_pred(r)
+                    if (self.result_role(r) == CONTRAPOSITIVE
+                        or self.state(step) != undefined
+                        or self.is_circular(r)):
+                        continue
+                    step = (step, ruled or self.follows_rule(r))
+                    if step[0] == atom or step in seen:
+                        continue
+                    seen.add(step)
+                    if not self.is_atom(step[0]):
+                        stack.append(step)
+                    elif step[0] not in atoms:
+                        continue
+                    elif step[1]:
+                        waits.append((step[0], atom))
+                    else:
+                        links.append((atom, step[0]))
+        return choose_defaults(atoms, waits, links, self.atom_name)
+
+    def take_defaults(self, phases, agenda, dependents):
+
+        """
+        Decides the default value of the atoms of each phase (see
+        next_defaults()) still Undefined, the TRUE and FALSE values deduced
+        from a phase being propagated before the next one.
+        """
+
+        for i, atoms in enumerate(phases):
+            if i:
+                self.propagate(agenda, dependents, definite=True)
+            for atom in atoms:
+                if self.state(atom) == Undefined.code:
+                    self.decide(atom, None, F.code)
+                    agenda.append(atom)
+        self.propagate(agenda, dependents)
+
+    def propagate(self, agenda, dependents, definite=False):
+
+        """
+        Recomputes the results depending on the queued predicates until the
+        agenda is empty, then applies the UNDETERMINED results one at a time
+        until none is left (they are left queued if definite is True).
+        """
+
+        while agenda or self.undetermined and not definite:
+            while agenda:
+                p = agenda.popleft()
+                for r in dependents.get(p, ()):
+                    self.apply(r, agenda)
+            if self.undetermined and not definite:
+                self.apply(self.undetermined.popleft(), agenda, True)
+
+    def reach_fixpoint(self, atoms, agenda, dependents):
+
+        """
+        Propagates the queued predicates, then takes the default value of
+        the given atoms left Undefined, the ones still waiting for others
+        after them (see next_defaults()), the propagation reaching its
+        fixpoint again after each step.
+        """
+
+        self.propagate(agenda, dependents)
+        while True:
+            phases = self.next_defaults(atoms, dependents)
+            if not phases:
+                break
+            self.take_defaults(phases, agenda, dependents)
+
+
+class DecisionStates:
+
+    """
+    Mapping of predicates to the value of the result their state was
+    deduced from (Undefined if there is none).
+    """
+
+    def __init__(self, decisions):
+        self.decisions = decisions
+
+    def __getitem__(self, pred):
+        decision = self.decisions.get(pred)
+        return decision.value if decision is not None else Undefined
+
+
+class ResultPropagator(Propagator):
+
+    """
+    Propagator of the results of the predicates of a knowledge base (see
+    src.Results).
+
+    The state of a predicate is the value of the result it was deduced from
+    (its decision), so states and decisions can't get out of sync. The
+    reasonning of each state (solutions, see src.Solution) is only built if
+    explain is True.
+
+    Decisions and solutions are stored in the memo of the given evaluation
+    context (see src.Context), the decided results being bound to it (see
+    Result.bind()).
+    """
+
+    def __init__(self, context, explain=False):
+        super().__init__()
+        self.context = context
+        self.decisions = context.memo.decisions
+        self.solutions = context.memo.solutions if explain else None
+        self.states = DecisionStates(self.decisions)
+
+    def state(self, pred):
+        decision = self.decisions.get(pred)
+        return decision.value.code if decision is not None else (
+            Undefined.code
+        )
+
+    def result_value(self, result):
+        return result.value_from_states(self.states).code
+
+    def result_pred(self, result):
+        return result.pred
+
+    def result_role(self, result):
+        return result_roles[type(result)]
+
+    def result_source(self, result):
+        return getattr(result, 'srcpred', None)
+
+    def follows_rule(self, result):
+        return result.follows_rule(self.states)
+
+    def is_atom(self, pred):
+        return isinstance(pred, src.Predicates.AtomicPredicate)
+
+    def atom_name(self, atom):
+        return atom.name
+
+    def decide(self, pred, result, value):
+        if result is None:
+            result = src.Results.DefaultResult(pred)
+        result = result.bind(values[value], self.context)
+        self.decisions[pred] = result
+        if self.solutions is not None:
+            self.solutions[pred] = self.make_solution(result)
+
+    def contradict(self, pred, result, value):
+        if self.solutions is None:
+            raise IncoherenceError
+        raise IncoherenceError(
+            self.solutions[pred],
+            self.make_solution(result.bind(values[value], self.context))
+        )
+
+    def make_solution(self, result):
+        return src.Solution.Solution(
+            result,
+            *[self.solutions[p] for p in result.sources()
+              if p in self.solutions]
+        )
+
+
+class ForwardChainer(ResultPropagator):
+
+    """
+    Engine deducing the state of every predicate of a knowledge base in a
+    single pass, instead of solving the queries one at a time (see
+    Predicate.solve()).
+
+    The facts (DefinedResults) seed an agenda of predicates whose state
+    changed. Each time a predicate is taken from the agenda, the results
+    depending on it (implications, equivalences, parent and child results)
+    are recomputed, and their predicates are queued if their state improved.
+    Once the fixpoint is reached, atomic predicates left Undefined take their
+    default value (FALSE, see Propagator.reach_fixpoint()).
+
+    A predicate's state can only go from Undefined to UNDETERMINED then to
+    TRUE or FALSE, so it is queued at most three times.
+
+    If queries are given, only the predicates they depend on are solved (see
+    KnowledgeBase.get_cone()), the results of the other ones aren't built.
+
+    The decisions (and solutions if explain is True) are stored in the
+    knowledge base's solutions memo.
+    """
+
+    def __init__(self, kb, explain=False, queries=None):
+        super().__init__(kb.context, explain)
+        self.kb = kb
+        self.predicates = kb.list_predicates()
+        if queries is not None:
+            cone = kb.get_cone(queries)
+            self.predicates = [p for p in self.predicates if p in cone]
+        self.dependents = {}
+        for p in self.predicates:
+            if not p.results_built:
+                p.make_results()
+        dead = self.find_dead_results(
+            r for p in self.predicates for r in p.results
+        )
+        for p in self.predicates:
+            for r in src.Results.sort_results(p.results):
+                if r in dead:
+                    continue
+                for srcpred in r.sources():
+                    self.dependents.setdefault(srcpred, []).append(r)
+
+    def run(self):
+
+        """
+        Computes the solution of every predicate.
+
+        It can be called again once the facts changed. The memo is
+        invalidated if the facts are incoherent, so no partial decision is
+        left in it.
+        """
+
+        self.kb.memo.invalidate()
+        self.undetermined.clear()
+        self.derived.clear()
+        agenda = collections.deque()
+        try:
+            for p in self.predicates:
+                for r in src.Results.sort_results(p.results):
+                    if not r.sources():
+                        self.apply(r, agenda)
+            atoms = [
+                p for p in self.predicates
+                if isinstance(p, src.Predicates.AtomicPredicate)
+            ]
+            self.reach_fixpoint(atoms, agenda, self.dependents)
+        except IncoherenceError:
+            self.kb.memo.invalidate()
+            raise
+        for p in self.predicates:
+            if p not in self.decisions:
+                self.decide(p, None, F.code)
+
+
+if __name__ == '__main__':
+    pass
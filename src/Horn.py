@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+import itertools
+from src.LogicalValues import T
+import src.Predicates
+import src.Results
+
+################################################################################
+#                                 Horn rules                                   #
+################################################################################
+
+def conjunction_atoms(pred):
+
+    """
+    Returns the atomic predicates of pred if it is an atomic predicate or a
+    conjunction of atomic predicates (A + B + C), None otherwise.
+    """
+
+    if isinstance(pred, src.Predicates.AtomicPredicate):
+        return (pred,)
+    if (isinstance(pred, src.Predicates.AndPredicate)
+        and all(isinstance(p, src.Predicates.AtomicPredicate)
+                for p in pred.operands)):
+        return pred.operands
+    return None
+
+
+class HornIndex:
+
+    """
+    Index of the Horn part of a knowledge base : the atomic predicates only
+    related (through rules, directly or not) by rules whose premise and
+    conclusion are conjunctions of atoms, like A + B => C or A <=> B + C.
+
+    Whether these atoms are TRUE doesn't depend on the rest of the knowledge
+    base : an atom is TRUE if the facts imply it. It is computed in linear
+    time by unit propagation (see propagate()), the atoms being bits of an
+    int and each rule counting its premises left to be TRUE.
+
+    The other atoms are left to the engines : they aren't always FALSE, e.g.
+    C of B => A and A <=> B + C is UNDETERMINED, B + C being FALSE while B
+    is.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+
+        # sorted, so the rule an atom is deduced from doesn't depend on the
+        # memory layout.
+        def by_id(preds):
+            return sorted(preds, key=lambda p: p.id)
+
+        rules = [
+            (p, q, cls)
+            for p in kb.list_predicates()
+            for q, cls in itertools.chain(
+                ((q, src.Results.ImplicationResult)
+                 for q in by_id(p.self_implies)),
+                ((q, src.Results.DefinedEquivalenceResult)
+                 for q in by_id(p.defined_eqs))
+            )
+        ]
+
+        # atoms related by a rule are in the same group (union find), a group
+        # is Horn if all of its rules are.
+        groups = {}
+
+        def find(atom):
+            root = atom
+            while groups.setdefault(root, root) is not root:
+                root = groups[root]
+            while atom is not root:
+                groups[atom], atom = root, groups[atom]
+            return root
+
+        non_horn = []
+        for premise, conclusion, cls in rules:
+            atoms = premise.list_atomic_preds() | conclusion.list_atomic_preds()
+            first = find(atoms.pop())
+            for atom in atoms:
+                groups[find(atom)] = first
+            if (conjunction_atoms(premise) is None
+                or conjunction_atoms(conclusion) is None):
+                non_horn.append(first)
+        non_horn = {find(atom) for atom in non_horn}
+
+        atoms = kb.get_instances(src.Predicates.AtomicPredicate).values()
+        self.atoms = [atom for atom in atoms if find(atom) not in non_horn]
+        self.bits = {atom : i for i, atom in enumerate(self.atoms)}
+
+        # Horn rules, and the rules having each atom as a premise.
+        self.rules = [
+            rule for rule in rules
+            if rule[0].list_atomic_preds() <= self.bits.keys()
+        ]
+        self.premises = [
+            [self.bits[a] for a in conjunction_atoms(premise)]
+            for premise, conclusion, cls in self.rules
+        ]
+        self.conclusions = [
+            [self.bits[a] for a in conjunction_atoms(conclusion)]
+            for premise, conclusion, cls in self.rules
+        ]
+        self.watchers = [[] for atom in self.atoms]
+        for r, premises in enumerate(self.premises):
+            for i in premises:
+                self.watchers[i].append(r)
+
+    def propagate(self, facts):
+
+        """
+        Returns the bitset of the Horn atoms the given atomic predicates imply
+        and a dict mapping the bit of each of them to the index of the rule
+        it was deduced from (None for facts).
+        """
+
+        true = 0
+        reasons = {}
+        counters = [len(premises) for premises in self.premises]
+        queue = []
+        for fact in sorted(facts, key=lambda p: p.id):
+            i = self.bits.get(fact)
+            if i is not None and not true >> i & 1:
+                true |= 1 << i
+                reasons[i] = None
+                queue.append(i)
+        while queue:
+            for r in self.watchers[queue.pop()]:
+                counters[r] -= 1
+                if counters[r]:
+                    continue
+                for i in self.conclusions[r]:
+                    if not true >> i & 1:
+                        true |= 1 << i
+                        reasons[i] = r
+                        queue.append(i)
+        return true, reasons
+
+    def make_result(self, atom, rule):
+
+        """
+        Returns the TRUE result deducing atom from the given rule.
+        """
+
+        premise, conclusion, cls = rule
+        if conclusion is atom:
+            result = cls(atom, premise)
+        else:
+            result = src.Results.AndParentResult(atom, conclusion)
+        result.value = T
+        return result
+
+    def make_decisions(self, context):
+
+        """
+        Returns a dict mapping every TRUE Horn atom to the result its state is
+        deduced from, given the facts of the evaluation context (see
+        src.Context).
+        """
+
+        true, reasons = self.propagate(context.facts)
+        decisions = {}
+        for i, atom in enumerate(self.atoms):
+            if not true >> i & 1:
+                continue
+            if reasons[i] is None:
+                result = src.Results.DefinedResult(atom, T)
+            else:
+                result = self.make_result(atom, self.rules[reasons[i]])
+            result.context = context
+            decisions[atom] = result
+        return decisions
+
+    def seed(self, context):
+
+        """
+        Stores the decision of every TRUE Horn atom in the memo of the
+        evaluation context, unless it already has one (see
+        SolutionMemo.seeded).
+        """
+
+        memo = context.memo
+        for atom, result in self.make_decisions(context).items():
+            memo.decisions.setdefault(atom, result)
+        memo.seeded = True
+
+
+if __name__ == '__main__':
+    pass
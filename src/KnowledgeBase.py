@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+from src.LogicalValues import T
+import src.Memo
+import src.Results
+import src.Predicates
+import src.Horn
+import src.Context
+import src.ForwardChaining
+
+################################################################################
+#                               Knowledge base                                 #
+################################################################################
+
+class KnowledgeBase:
+
+    """
+    Session object owning everything a parsed file is made of : the interned
+    predicates (and through them, their entities and results), the
+    equivalence index, the facts, the queries and the solutions memo.
+
+    Every predicate belongs to a single knowledge base (given with the kb
+    keyword argument when created), so several knowledge bases can live in
+    the same process and be freed independently.
+    """
+
+    def __init__(self):
+        # interned predicates, by class then by key (see MemoizeMetaclass).
+        self.instances = {}
+
+        # number of created predicates, used as their ids (see make_id()).
+        self.created = 0
+
+        # registered predicates indexed by their signature (see
+        # src.TruthTables.make_signature()).
+        self.signatures = {}
+
+        # When set, registered predicates are queued in pending instead of
+        # being linked to their equivalents right away (see link_pending()).
+        self.deferred_linking = False
+        self.pending = []
+
+        self.facts = set()
+        self.queries = set()
+
+        # Final solutions of the solved predicates.
+        self.memo = src.Memo.SolutionMemo()
+
+        # Evaluation context of the facts above (see src.Context).
+        self.context = src.Context.EvaluationContext(self, memo=self.memo)
+
+        # Index of the Horn part of the rules, built when first needed (see
+        # get_horn_index()).
+        self.horn = None
+
+        # Results that can't change the state of their predicate, found when
+        # first needed (see get_dead_results()).
+        self.dead_results = None
+
+    def get_instances(self, cls):
+
+        """
+        Returns the dict interning the instances of the given predicate class.
+        """
+
+        return self.instances.setdefault(cls, {})
+
+    def find_atom(self, name):
+
+        """
+        Returns the atomic predicate of the given name, or None if the rules,
+        facts and queries don't name it. Unlike AtomicPredicate(name, kb=kb),
+        no predicate is created, so it can be called on a knowledge base
+        shared by workers or threads.
+        """
+
+        return self.instances.get(src.Predicates.AtomicPredicate, {}).get(
+            (name,)
+        )
+
+    def make_id(self):
+
+        """
+        Returns the id of a new predicate : predicates are numbered in
+        creation order, which orders the operands of commutative predicates
+        (see ParentPredicate.canonical_args()).
+        """
+
+        self.created += 1
+        return self.created
+
+    def list_predicates(self):
+
+        """
+        Returns a list containing every registered predicate.
+        """
+
+        return [
+            p
+            for instances in self.instances.values()
+            for p in instances.values()
+        ]
+
+    def register(self, pred):
+
+        """
+        Links the equivalences of a new predicate, or queues it if linking is
+        deferred.
+        """
+
+        if self.deferred_linking:
+            self.pending.append(pred)
+        else:
+            pred.link_equivalents()
+
+    def link_pending(self):
+
+        """
+        Links the equivalences of every predicate queued while linking was
+        deferred, in a single pass.
+
+        Pending predicates are grouped by signature : the atomic predicates
+        they depend on (hence their arity) and their truth table over them.
+        Each group is then merged with the entity of the already registered
+        predicates sharing its signature, so no pair of predicates is ever
+        compared.
+        """
+
+        groups = {}
+        for p in self.pending:
+            groups.setdefault(p.get_signature(), []).append(p)
+        self.pending = []
+        for signature, preds in groups.items():
+            known = self.signatures.setdefault(signature, set())
+            entity = (next(iter(known)) if known else preds[0]).entity
+            for p in preds:
+                entity.merge(p.entity)
+            known.update(preds)
+        self.memo.invalidate()
+
+    def get_cone(self, preds):
+
+        """
+        Returns the set of the given predicates and of the predicates their
+        states depend on, directly or not : the only ones whose results must
+        be built and solved to solve them.
+
+        It is walked over Predicate.list_related() without building any
+        result, so its cost only depends on the size of the cone.
+        """
+
+        cone = set(preds)
+        stack = list(cone)
+        while stack:
+            for q in stack.pop().list_related():
+                if q not in cone:
+                    cone.add(q)
+                    stack.append(q)
+        return cone
+
+    def build_results(self):
+
+        """
+        Builds the results of every predicate, the dead ones (see
+        get_dead_results()) and the Horn index, which are otherwise built when
+        first needed : the predicates are then only read while solving, and
+        can be shared by concurrent evaluation contexts (see src.Context).
+        """
+
+        self.get_dead_results()
+        self.get_horn_index()
+
+    def get_horn_index(self):
+
+        """
+        Returns the src.Horn.HornIndex of the current rules.
+        """
+
+        if self.horn is None:
+            self.horn = src.Horn.HornIndex(self)
+        return self.horn
+
+    def get_dead_results(self):
+
+        """
+        Returns the set of the results that can't change the state of their
+        predicate (see Propagator.find_dead_results()), building the results
+        of every predicate.
+        """
+
+        if self.dead_results is None:
+            results = []
+            for p in self.list_predicates():
+                if not p.results_built:
+                    p.make_results()
+                results.extend(p.results)
+            self.dead_results = src.ForwardChaining.ResultPropagator(
+                self.context
+            ).find_dead_results(results)
+        return self.dead_results
+
+    def rules_changed(self):
+
+        """
+        Forgets everything computed from the rules, to be called when a rule
+        is added.
+        """
+
+        self.horn = None
+        self.dead_results = None
+        self.memo.invalidate()
+
+    def assert_fact(self, name):
+
+        """
+        Sets the atomic predicate name TRUE, only the decisions depending on
+        it are forgotten (see invalidate_cone()).
+        """
+
+        pred = src.Predicates.AtomicPredicate(name, kb=self)
+        if pred not in self.facts:
+            pred.results.add(src.Results.DefinedResult(pred, T))
+            self.facts.add(pred)
+            self.invalidate_cone(pred)
+
+    def retract_fact(self, name):
+
+        """
+        Removes the fact name, only the decisions depending on it are
+        forgotten (see invalidate_cone()).
+        """
+
+        pred = src.Predicates.AtomicPredicate(name, kb=self)
+        if pred in self.facts:
+            pred.results = {
+                r for r in pred.results
+                if not isinstance(r, src.Results.DefinedResult)
+            }
+            self.facts.remove(pred)
+            self.invalidate_cone(pred)
+
+    def invalidate_cone(self, pred, context=None):
+
+        """
+        Forgets the decisions and solutions of the predicates depending,
+        directly or not, on pred after its facts changed, the other ones are
+        kept, in the memo of the given evaluation context (the knowledge
+        base's one by default, see src.Context).
+
+        A predicate is only solved once the predicates it depends on are
+        (see src.Condensation), so the cone is walked from pred through the
+        solved predicates only (see Predicate.list_related()). The TRUE Horn
+        atoms don't follow this rule (they are solved at once, see src.Horn),
+        they are computed again and the atoms that became or stopped being
+        TRUE are walked from too.
+
+        The decisions kept are the ones solving from scratch would make,
+        since the state of a predicate only depends on the predicates it is
+        related to, not on the ones solved before it (default values are
+        taken in the same order whatever the queries, see
+        src.ForwardChaining.choose_defaults()).
+        """
+
+        context = context or self.context
+        memo = context.memo
+        starts = [pred]
+        horn_decisions = {}
+        if memo.seeded:
+            horn = self.get_horn_index()
+            horn_decisions = horn.make_decisions(context)
+            for atom in horn.atoms:
+                decision = memo.decisions.get(atom)
+                if (atom in horn_decisions) != (
+                        decision is not None and decision.value == T):
+                    starts.append(atom)
+        seen = set(starts)
+        while starts:
+            p = starts.pop()
+            if (p is not pred
+                and p not in memo.decisions and p not in memo.solutions):
+                continue
+            memo.decisions.pop(p, None)
+            memo.solutions.pop(p, None)
+            for q in p.list_related():
+                if q not in seen:
+                    seen.add(q)
+                    starts.append(q)
+        memo.decisions.update(horn_decisions)
+
+    def reset_facts(self):
+
+        """
+        Removes every fact and forgets every computed value, the predicates
+        and their results are kept.
+        """
+
+        for p in self.facts:
+            p.results = {
+                r for r in p.results
+                if not isinstance(r, src.Results.DefinedResult)
+            }
+        self.facts = set()
+        self.memo.invalidate()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import mmap
+import struct
+import numpy
+from src.Exceptions import CompiledFileError
+import src.CompactGraph
+
+################################################################################
+#                          Compiled knowledge base file                        #
+################################################################################
+
+# File layout (little endian) :
+# - header : magic, format version, number of arrays.
+# - one entry per array : name, dtype, offset from the start of the file and
+#   number of items.
+# - the arrays data, each one aligned on 8 bytes.
+
+MAGIC = b'ESKB'
+VERSION = 1
+
+header_format = struct.Struct('<4sII')
+entry_format = struct.Struct('<16s4sQQ')
+
+ALIGNMENT = 8
+
+
+def graph_arrays(graph):
+
+    """
+    Returns the (name, array) pairs needed to rebuild a CompactGraph.
+    """
+
+    return (
+        ('kinds', graph.kinds),
+        ('names', graph.names),
+        ('childs.offsets', graph.childs.offsets),
+        ('childs.targets', graph.childs.targets),
+        ('implies.offsets', graph.implies.offsets),
+        ('implies.targets', graph.implies.targets),
+        ('eqs.offsets', graph.defined_eqs.offsets),
+        ('eqs.targets', graph.defined_eqs.targets),
+        ('entities', graph.entities),
+        ('facts', graph.facts),
+        ('queries', graph.queries),
+    )
+
+
+def dump(graph, filename):
+
+    """
+    Writes the compact graph to filename.
+    """
+
+    arrays = graph_arrays(graph)
+    offset = header_format.size + entry_format.size * len(arrays)
+    entries = []
+    for name, array in arrays:
+        offset += -offset % ALIGNMENT
+        entries.append(entry_format.pack(
+            name.encode(), array.dtype.str.encode(), offset, len(array)
+        ))
+        offset += array.nbytes
+    with open(filename, 'wb') as f:
+        f.write(header_format.pack(MAGIC, VERSION, len(arrays)))
+        for entry in entries:
+            f.write(entry)
+        for _, array in arrays:
+            f.write(b'\0' * (-f.tell() % ALIGNMENT))
+            f.write(array.tobytes())
+
+
+def is_compiled(filename):
+
+    """
+    Returns True if filename is a compiled knowledge base file.
+    """
+
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load(filename):
+
+    """
+    Returns the CompactGraph stored in filename.
+
+    The file is memory-mapped and the graph arrays are read-only views on it,
+    so nothing is parsed nor copied.
+    """
+
+    with open(filename, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < header_format.size:
+        raise CompiledFileError("%s is truncated" % filename)
+    magic, version, count = header_format.unpack_from(buffer)
+    if magic != MAGIC:
+        raise CompiledFileError("%s isn't a compiled file" % filename)
+    if version != VERSION:
+        raise CompiledFileError(
+            "%s has format version %d, %d expected" % (
+                filename, version, VERSION
+            )
+        )
+    if header_format.size + count * entry_format.size > len(buffer):
+        raise CompiledFileError("%s is truncated" % filename)
+    arrays = {}
+    for i in range(count):
+        name, dtype, offset, length = entry_format.unpack_from(
+            buffer, header_format.size + i * entry_format.size
+        )
+        dtype = numpy.dtype(dtype.rstrip(b'\0').decode())
+        if offset + length * dtype.itemsize > len(buffer):
+            raise CompiledFileError("%s is truncated" % filename)
+        arrays[name.rstrip(b'\0').decode()] = numpy.frombuffer(
+            buffer, dtype=dtype, count=length, offset=offset
+        )
+
+    def array(name):
+        if name not in arrays:
+            raise CompiledFileError("%s has no %s array" % (filename, name))
+        return arrays[name]
+
+    Adjacency = src.CompactGraph.Adjacency
+    return src.CompactGraph.CompactGraph(
+        kinds=array('kinds'),
+        names=array('names'),
+        childs=Adjacency(array('childs.offsets'), array('childs.targets')),
+        implies=Adjacency(array('implies.offsets'), array('implies.targets')),
+        defined_eqs=Adjacency(array('eqs.offsets'), array('eqs.targets')),
+        entities=array('entities'),
+        facts=array('facts'),
+        queries=array('queries')
+    )
+
+
+if __name__ == '__main__':
+    pass
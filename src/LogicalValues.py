@@ -5,16 +5,20 @@
 ################################################################################
 
 class LogicalValue:
-    def __init__(self, s):
+    def __init__(self, s, code):
         self.s = s
+        self.code = code
 
     def __str__(self):
         return self.s
 
-Undefined = LogicalValue("UNDEFINED")
-T = LogicalValue("TRUE")
-F = LogicalValue("FALSE")
-U = LogicalValue("UNDETERMINED")
+F = LogicalValue("FALSE", 0)
+T = LogicalValue("TRUE", 1)
+U = LogicalValue("UNDETERMINED", 2)
+Undefined = LogicalValue("UNDEFINED", 3)
+
+# Logical values indexed by their code (used by vectorized evaluation).
+values = (F, T, U, Undefined)
 
 if __name__ == '__main__':
     pass
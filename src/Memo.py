@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+################################################################################
+#                               Solutions memo                                 #
+################################################################################
+
+class SolutionMemo:
+
+    """
+    Table holding the final state of each solved predicate, so displaying
+    a query's reasonning doesn't solve the same predicates again and again.
+
+    The state of a predicate is held by the result it was deduced from
+    (decisions), which is enough to print the predicate's value. The whole
+    reasonning (solutions, see src.Solution) is only built for the
+    predicates whose explanation is asked for.
+
+    It must be invalidated (see invalidate()) whenever facts or rules change.
+
+    Only final states are stored : predicates are solved a whole strongly
+    connected component at a time (see src.Condensation).
+    """
+
+    def __init__(self):
+        self.decisions = {}
+        self.solutions = {}
+        self.hits = 0
+        self.misses = 0
+        # True once the decisions of the Horn atoms are stored (see
+        # src.Horn.HornIndex.seed()).
+        self.seeded = False
+
+    def count(self, found):
+        if found is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return found
+
+    def get(self, pred):
+        """
+        Returns the stored solution of pred, or None if there is none.
+        """
+
+        return self.count(self.solutions.get(pred))
+
+    def get_decision(self, pred):
+        """
+        Returns the result pred's state was deduced from, or None if it
+        isn't solved.
+        """
+
+        return self.count(self.decisions.get(pred))
+
+    def invalidate(self):
+        self.decisions.clear()
+        self.solutions.clear()
+        self.seeded = False
+
+    def __str__(self):
+        return "Solutions memo : {hits} hits, {misses} misses".format(
+            hits=self.hits,
+            misses=self.misses
+        )
+
+
+if __name__ == '__main__':
+    pass
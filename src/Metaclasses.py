@@ -7,22 +7,34 @@ import src.Predicates
 ################################################################################
 
 class MemoizeMetaclass(type):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.instances = {}
-    
+
+    """
+    Interns the instances in the knowledge base given with the kb keyword
+    argument (see KnowledgeBase.get_instances()).
+
+    Instances are keyed by their canonical arguments (see
+    Predicate.canonical_args()), so structurally equal predicates are a
+    single dict lookup away.
+    """
+
     def __call__(cls, *args, **kwargs):
         if "register" in kwargs.keys():
             register = kwargs["register"]
             #del kwargs["register"]
         else:
             register = True
-        key = frozenset(args)
-        if key in cls.instances.keys():
-            return cls.instances[key]
+        args = cls.canonical_args(args)
+        if (len(args) == 1
+            and issubclass(cls, src.Predicates.ParentPredicate)):
+            # e.g. A + A is A
+            return args[0]
+        instances = kwargs["kb"].get_instances(cls)
+        key = args
+        if key in instances.keys():
+            return instances[key]
         obj = super().__call__(*args, **kwargs)
         if register or cls == src.Predicates.AtomicPredicate:
-            cls.instances[key] = obj
+            instances[key] = obj
         return obj
 
 
@@ -34,15 +46,16 @@ class MemoizeNotMetaclass(MemoizeMetaclass):
             #del kwargs["register"]
         else:
             register = True
-        key = frozenset(args)
-        if key in cls.instances.keys():
-            return cls.instances[key]
+        instances = kwargs["kb"].get_instances(cls)
+        key = args
+        if key in instances.keys():
+            return instances[key]
         if type(args[0]) == cls:
             obj = args[0].p
         else:
             obj = super().__call__(*args, **kwargs)
         if register:
-            cls.instances[key] = obj
+            instances[key] = obj
         return obj
 
 
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import gc
+import multiprocessing
+
+################################################################################
+#                            Parallel evaluation                               #
+################################################################################
+
+# Function and context shared with the workers : they are set before the
+# workers are forked, so the workers inherit them (copy-on-write) instead of
+# receiving them pickled.
+shared = None
+
+
+def call_shared(item):
+    function, context = shared
+    return function(context, item)
+
+
+def map_in_workers(function, context, items, jobs, chunksize=32):
+
+    """
+    Yields function(context, item) for every item, in the items order.
+
+    The calls are distributed by chunks to jobs forked workers. context (a
+    loaded knowledge base for instance) is never pickled, only the items and
+    the returned values are. If jobs is lower than 2 or processes can't be
+    forked, everything is computed in the current process.
+    """
+
+    global shared
+    if jobs < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        for item in items:
+            yield function(context, item)
+        return
+    shared = (function, context)
+    # Objects existing before the fork are moved out of the collected
+    # generations, so the garbage collector doesn't copy their pages.
+    gc.freeze()
+    try:
+        with multiprocessing.get_context('fork').Pool(jobs) as pool:
+            yield from pool.imap(call_shared, items, chunksize)
+    finally:
+        gc.unfreeze()
+        shared = None
+
+
+if __name__ == '__main__':
+    pass
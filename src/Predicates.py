@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
+import functools
 from src.LogicalValues import T, F, U, Undefined
 import src.Entity
 import src.Results
 import src.Metaclasses
+import src.TruthTables
 
 ################################################################################
 #                                  Predicates                                  #
@@ -18,7 +20,7 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
     a tree structure.
     """
 
-    def __init__(self, register=True):
+    def __init__(self, register=True, kb=None):
         """
         Predicate __init__ method adds containers for :
         -predicates implied by the instance.
@@ -28,9 +30,13 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         -parents predicates.
         
         It also adds the entity the instance represents, and init the
-        equivalence links (if register args is True).
+        equivalence links (if register args is True), or queues the instance
+        to be linked later if the knowledge base defers linking.
         """
 
+        self.kb = kb
+        self.id = kb.make_id()
+
         # related predicates
         self.self_implies = set()
         self.is_implied_by = set()
@@ -39,62 +45,38 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         
         self.entity = src.Entity.Entity(self)        
         self.results = set()
+        self.signature = None
 
         # flags
-        self.used = False
         self.results_built = False
 
         if register:
-            self.link_equivalents()
+            self.kb.register(self)
         
-    def solve(self, verbose=False, debug=False):
+    def solve(self, verbose=False, debug=False, context=None):
         """
         This method solves the state of the current predicate by
         computing all the values of related predicates.
 
-        It must avoid cyclic route that would lead to infinite loop.
+        The predicates it depends on are solved first, one strongly
+        connected component at a time (see src.Condensation), so cyclic
+        rules need no special handling.
 
-        Here must be the expected returned format :
+        Returns the predicate's solution (see src.Solution) in the given
+        evaluation context (see src.Context), the knowledge base's one by
+        default.
+        """
 
-        solution :
-        {
-            'result' : ,
-            'length' : ,
-            'parent_solutions' : [solution1 [, solution2]]
-        }
+        return (context or self.kb.context).solve(self)
+
+    def evaluate(self, context=None):
+        """
+        Value-only counterpart of solve() : returns the result the state of
+        the predicate is deduced from (its value attribute is the state),
+        without building the reasonning.
         """
 
-        if self.used:
-            return None
-        self.used = True
-        if self.results_built == False:
-            self.make_results()
-        solutions = [r.get_solution() for r in self.results]
-        T_res = None
-        F_res = None
-        U_res = None
-        for s in solutions:
-            if s == None:
-                continue
-            if s.result.value == T:
-                if F_res != None:
-                    raise Exception()
-                elif T_res == None or s.length < T_res.length:
-                    T_res = s
-            elif s.result.value == F:
-                if T_res != None:
-                    raise Exception()
-                elif F_res == None or s.length < F_res.length:
-                    F_res = s
-            elif s.result.value == U:
-                if U_res == None or s.result.length < U_res.result.length:
-                    U_res = s
-        solution = (
-            T_res or F_res or U_res
-            or src.Results.DefaultResult(self).get_solution()
-        )
-        self.used = False
-        return solution
+        return (context or self.kb.context).evaluate(self)
 
     
     def link_equivalents(self):
@@ -107,6 +89,8 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         eqs = self.get_equivalents()
         for e in eqs:
             e.merge(self.entity)
+        self.kb.memo.invalidate()
+        self.kb.signatures.setdefault(self.get_signature(), set()).add(self)
     
     def get_equivalents(self):
 
@@ -115,18 +99,10 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         are equivalents with self.
         """
 
-        result = set()
-        for c in (
-                NotPredicate,
-                OrPredicate,
-                XorPredicate,
-                AndPredicate,
-                AtomicPredicate
-        ):
-            for p in c.instances.values():
-                if self.is_eq(p):
-                    result.add(p.entity)
-        return result
+        return {
+            p.entity
+            for p in self.kb.signatures.get(self.get_signature(), ())
+        }
 
     
     def is_eq(self, pred):
@@ -135,32 +111,17 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         Returns True if pred and self are equivalent, False otherwise.
         """
 
-        # states an atomicpredicate can take.
-        states = [F, T, U]
-        cases_number = len(states)
-        
-        # make copies to compare each case :
-        selfbis = self.make_bis()
-        predbis = pred.make_bis()
-
-        # Get every atomic predicates involved in copies :
-        atompreds = selfbis.list_atomic_preds()
-        atompreds.update(predbis.list_atomic_preds())
-
-        # Making an iterable from it :
-        atompreds = list(atompreds)
-
-        result = True
-
-        # looping through different states :
-        for a in range(0, cases_number ** len(atompreds)):
-            for p, i in zip(atompreds, range(0, len(atompreds))):
-                state = (a // cases_number ** i) % cases_number
-                p.value = states[state]
-            result &= selfbis.get_direct_state() == predbis.get_direct_state()
-        for p in atompreds:
-            del AtomicPredicate.instances[frozenset((p.name,))]
-        return result
+        return self.get_signature() == pred.get_signature()
+
+    def get_signature(self):
+
+        """
+        Returns the canonical semantic key of the predicate (computed once).
+        """
+
+        if self.signature is None:
+            self.signature = src.TruthTables.make_signature(self)
+        return self.signature
 
     
     def list_atomic_preds(self):
@@ -172,14 +133,49 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         result = set()
         if isinstance(self, AtomicPredicate):
             result.update((self,))
-        elif (isinstance(self, OrPredicate) or isinstance(self, AndPredicate)
-              or isinstance(self, XorPredicate)):
-            result.update(self.p1.list_atomic_preds())
-            result.update(self.p2.list_atomic_preds())
-        elif isinstance(self, NotPredicate):
-            result.update(self.p.list_atomic_preds())
+        for p in self.list_childs():
+            result.update(p.list_atomic_preds())
         return result
 
+    def list_childs(self):
+
+        """
+        Returns a tuple containing the predicates directly contained by self.
+        """
+
+        raise NotImplementedError
+
+    def list_related(self):
+
+        """
+        Returns a set containing the predicates whose results may depend on
+        the state of self (a superset of them, found without building any
+        result) : its equivalents, the predicates it implies or is implied
+        by, its childs, its parents and their childs.
+
+        These are also the sources of the results of self (see
+        make_results()), the relation being symmetric.
+        """
+
+        related = set(self.entity.predicates)
+        related.update(self.self_implies, self.is_implied_by)
+        related.update(self.list_childs())
+        for p in self.contained_by:
+            related.add(p)
+            related.update(p.list_childs())
+        related.discard(self)
+        return related
+
+    @classmethod
+    def canonical_args(cls, args):
+
+        """
+        Returns the arguments the predicate is interned with (see
+        src.Metaclasses.MemoizeMetaclass), as a tuple.
+        """
+
+        return args
+
     def make_results(self):
 
         """
@@ -204,9 +200,13 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         for pred in self.entity.predicates :
             if not pred is self:
                 if pred in self.defined_eqs:
-                    self.results.add(DefinedEquivalenceResult(self, pred))
+                    self.results.add(
+                        src.Results.DefinedEquivalenceResult(self, pred)
+                    )
                 else:
-                    self.results.add(DeducedEquivalenceResult(self, pred))
+                    self.results.add(
+                        src.Results.DeducedEquivalenceResult(self, pred)
+                    )
 
     
     def make_direct_implication_results(self):
@@ -248,11 +248,25 @@ class Predicate(metaclass=src.Metaclasses.MemoizeMetaclass):
         self.results.add(src.Results.ChildResult(self))
 
     
-    def make_bis(self):
+    def get_vector_state(self, columns):
 
         """
-        Used to make a copy of self, the AtomicPredicates names change ('-bis'
-        at their end.
+        Returns a numpy array holding the state codes of the predicate for
+        every assignment column of the atomic predicates (see
+        src.TruthTables.make_columns()).
+
+        The computed array is stored in columns so shared sub-predicates are
+        only evaluated once.
+        """
+
+        if self not in columns:
+            columns[self] = self.get_vector_substate(columns)
+        return columns[self]
+
+    def get_vector_substate(self, columns):
+
+        """
+        Computes the array returned by get_vector_state().
         """
 
         raise NotImplementedError
@@ -267,14 +281,16 @@ class AtomicPredicate(Predicate):
         self.name = name
         super().__init__(*args, **kwargs)
         
-    def make_bis(self):
-        return AtomicPredicate(self.name + "-bis", register=False)
-
     def set_initial_state(self, state=T):
         self.results.add(src.Results.DefinedResult(self, value=T))
+        self.kb.facts.add(self)
+        self.kb.memo.invalidate()
     
-    def get_direct_state(self):
-        return self.value
+    def list_childs(self):
+        return ()
+
+    def get_vector_substate(self, columns):
+        raise KeyError(self)
 
     def __str__(self):
         return self.name
@@ -292,19 +308,24 @@ class NotPredicate(Predicate):#, metaclass=MemoizeNotMetaclass):
         T : F
     }
 
+    vector_table = src.TruthTables.make_lookup_table(values_table, 1)
+
     def __init__(self, pred, *args, **kwargs):
         self.p = pred
         self.p.contained_by.add(self)
         super().__init__(*args, **kwargs)
     
-    def make_bis(self):
-        return NotPredicate(self.p.make_bis(), register=False)
+    def list_childs(self):
+        return (self.p,)
 
     def get_state(self):
-        return self.values_table[self.p.solve()]
+        return self.get_state_from(src.Results.SolvedStates())
+
+    def get_state_from(self, states):
+        return self.values_table[states[self.p]]
 
-    def get_direct_state(self):
-        return self.values_table[self.p.get_direct_state()]
+    def get_vector_substate(self, columns):
+        return self.vector_table[self.p.get_vector_state(columns)]
 
     def __str__(self):
         if (isinstance(self.p, AtomicPredicate)
@@ -317,46 +338,81 @@ class NotPredicate(Predicate):#, metaclass=MemoizeNotMetaclass):
     
 class ParentPredicate(Predicate):
 
-    def __init__(self, pred1, pred2, *args, **kwargs):
-        self.p1 = pred1
-        self.p2 = pred2
-        self.p1.contained_by.add(self)
-        self.p2.contained_by.add(self)
-        super().__init__(*args, **kwargs)
+    """
+    Predicate combining any number of operands with an associative and
+    commutative operator (see canonical_args()).
+    """
+
+    # True if repeating an operand doesn't change the predicate (A + A is A).
+    idempotent = True
+
+    def __init__(self, *preds, **kwargs):
+        self.operands = preds
+        for p in self.operands:
+            p.contained_by.add(self)
+        super().__init__(**kwargs)
 
-    def make_bis(self):
-        p1_bis = self.p1.make_bis()
-        p2_bis = self.p2.make_bis()
-        return type(self)(p1_bis, p2_bis, register = False)
+    @classmethod
+    def canonical_args(cls, args):
+
+        """
+        Flattens the operands of the same class ((A + B) + C is A + B + C),
+        sorts them by id and removes the repeated ones if the operator is
+        idempotent, so the operands tuple is the same whatever the way the
+        predicate was written.
+        """
+
+        operands = []
+        for p in args:
+            if type(p) is cls:
+                operands.extend(p.operands)
+            else:
+                operands.append(p)
+        if cls.idempotent:
+            operands = {p.id : p for p in operands}.values()
+        return tuple(sorted(operands, key=lambda p: p.id))
+
+    def list_childs(self):
+        return self.operands
 
     def get_state(self):
-        return self.values_table[
-            (
-                self.p1.solve(),
-                self.p2.solve()
-            )
-        ]
+        return self.get_state_from(src.Results.SolvedStates())
+
+    def get_state_from(self, states):
+        return self.fold_states(self.operands, states)
+
+    def fold_states(self, preds, states):
+
+        """
+        Returns the state of the operator applied to the given predicates
+        (None if there is none) : the operators being associative, the
+        binary values_table is folded over them.
+        """
+
+        return functools.reduce(
+            lambda state, p: self.values_table[(state, states[p])],
+            preds[1:],
+            states[preds[0]] if preds else None
+        )
     
-    def get_direct_state(self):
-        return self.values_table[
-            (
-                self.p1.get_direct_state(),
-                self.p2.get_direct_state()
-            )
-        ]
+    def get_vector_substate(self, columns):
+        return functools.reduce(
+            lambda table, p: self.vector_table[
+                table, p.get_vector_state(columns)
+            ],
+            self.operands[1:],
+            self.operands[0].get_vector_state(columns)
+        )
 
     def __str__(self):
-        if (isinstance(self.p1, AtomicPredicate) or
-            isinstance(self.p1, NotPredicate)):
-            p1 = str(self.p1)
-        else:
-            p1 = "(%s)" % self.p1
-        if (isinstance(self.p2, AtomicPredicate)
-            or isinstance(self.p2, NotPredicate)):
-            p2 = str(self.p2)
-        else:
-            p2 = "(%s)" % self.p2
-        return ("%s %s %s" % (p1, self.op, p2))
+        texts = []
+        for p in self.operands:
+            if (isinstance(p, AtomicPredicate)
+                or isinstance(p, NotPredicate)):
+                texts.append(str(p))
+            else:
+                texts.append("(%s)" % p)
+        return (" %s " % self.op).join(texts)
     
 
 class OrPredicate(ParentPredicate):
@@ -382,7 +438,9 @@ class OrPredicate(ParentPredicate):
         (T, T) : T
     }
 
-    op = '+'
+    vector_table = src.TruthTables.make_lookup_table(values_table, 2)
+
+    op = '|'
         
 class AndPredicate(ParentPredicate):
 
@@ -407,7 +465,9 @@ class AndPredicate(ParentPredicate):
         (T, T) : T
     }
 
-    op = '|'
+    vector_table = src.TruthTables.make_lookup_table(values_table, 2)
+
+    op = '+'
     
 class XorPredicate(ParentPredicate):
 
@@ -432,8 +492,13 @@ class XorPredicate(ParentPredicate):
         (T, T) : F
     }
 
+    vector_table = src.TruthTables.make_lookup_table(values_table, 2)
+
     op = '^'
 
+    # A ^ A isn't FALSE when A is UNDETERMINED.
+    idempotent = False
+
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+import json
+import time
+import src.parsing
+import src.Predicates
+import src.Results
+import src.Metaclasses
+import src.TruthTables
+import src.KnowledgeBase
+import src.Memo
+import src.ForwardChaining
+import src.Condensation
+import src.Horn
+
+################################################################################
+#                                  Profiling                                   #
+################################################################################
+
+# Functions and methods timed by the profiler, as (owner, name) pairs.
+hot_paths = (
+    (src.parsing, 'parse'),
+    (src.KnowledgeBase.KnowledgeBase, 'link_pending'),
+    (src.TruthTables, 'make_signature'),
+    (src.Predicates.Predicate, 'is_eq'),
+    (src.Predicates.Predicate, 'get_equivalents'),
+    (src.Predicates.Predicate, 'make_results'),
+    (src.Predicates.Predicate, 'solve'),
+    (src.Predicates.Predicate, 'evaluate'),
+    (src.Horn.HornIndex, '__init__'),
+    (src.Horn.HornIndex, 'propagate'),
+    (src.Condensation.TopologicalSolver, 'solve'),
+    (src.Condensation.TopologicalSolver, 'solve_component'),
+    (src.ForwardChaining.ForwardChainer, 'run')
+)
+
+
+class Profiler:
+
+    """
+    Counts the calls of the solver's hot paths and the time spent in them
+    while it is enabled (it is a context manager) :
+    - calls and cumulative time of the functions of hot_paths.
+    - results created, applied (see Propagator.apply()) and time spent
+      applying them, by Result subclass.
+    - predicates created and truth table rows evaluated (see
+      src.TruthTables.make_signature()).
+    - hit rates of the interned predicates, the signatures and the solutions
+      memo.
+
+    The functions are wrapped in place, so only the current process is
+    profiled.
+    """
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.seconds = collections.Counter()
+        self.rows = 0
+        self.patches = []
+
+    def instrument(self, owner, name, label, on_call=None):
+
+        """
+        Replaces the function name of owner (a class or a module) with a
+        wrapper counting its calls and timing them under the key returned by
+        label(args), and calling on_call(args) if it is given.
+        """
+
+        function = getattr(owner, name)
+        profiler = self
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = label(args)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.seconds[key] += time.perf_counter() - start
+                profiler.calls[key] += 1
+                if on_call is not None:
+                    on_call(args)
+
+        self.patches.append((owner, name, function))
+        setattr(owner, name, wrapper)
+
+    def count_rows(self, args):
+        self.rows += len(src.TruthTables.atomic_states) ** len(args[0])
+
+    def __enter__(self):
+        for owner, name in hot_paths:
+            key = ('call', '%s.%s' % (owner.__name__.split('.')[-1], name))
+            self.instrument(owner, name, lambda args, key=key: key)
+        self.instrument(
+            src.Predicates.Predicate, 'get_signature',
+            lambda args: ('cache', 'signature lookups')
+        )
+        self.instrument(
+            src.TruthTables, 'make_columns',
+            lambda args: ('cache', 'signatures computed'), self.count_rows
+        )
+        self.instrument(
+            src.Metaclasses.MemoizeMetaclass, '__call__',
+            lambda args: ('cache', 'predicate lookups')
+        )
+        self.instrument(
+            src.Predicates.Predicate, '__init__',
+            lambda args: ('cache', 'predicates created')
+        )
+        self.instrument(
+            src.Memo.SolutionMemo, 'count',
+            lambda args: (
+                'cache', 'memo misses' if args[1] is None else 'memo hits'
+            )
+        )
+        self.instrument(
+            src.Results.Result, '__init__',
+            lambda args: ('created', type(args[0]).__name__)
+        )
+        self.instrument(
+            src.ForwardChaining.Propagator, 'apply',
+            lambda args: ('applied', type(args[1]).__name__)
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        while self.patches:
+            owner, name, function = self.patches.pop()
+            setattr(owner, name, function)
+
+    def get_report(self):
+
+        """
+        Returns the collected counters as a dict (see write_json()).
+        """
+
+        def cache(hits, misses):
+            total = hits + misses
+            return {
+                'hits' : hits,
+                'misses' : misses,
+                'hit_rate' : hits / total if total else None
+            }
+
+        def section(kind):
+            return sorted(name for k, name in self.calls if k == kind)
+
+        def count(kind, name):
+            return self.calls[(kind, name)]
+
+        created = count('cache', 'predicates created')
+        computed = count('cache', 'signatures computed')
+        return {
+            'calls' : {
+                name : {
+                    'calls' : count('call', name),
+                    'seconds' : self.seconds[('call', name)]
+                }
+                for name in section('call')
+            },
+            'results' : {
+                name : {
+                    'created' : count('created', name),
+                    'applied' : count('applied', name),
+                    'seconds' : self.seconds[('applied', name)]
+                }
+                for name in sorted(set(section('created'))
+                                   | set(section('applied')))
+            },
+            'counters' : {
+                'predicates created' : created,
+                'results created' : sum(
+                    count('created', name) for name in section('created')
+                ),
+                'truth table rows' : self.rows
+            },
+            'caches' : {
+                'interned predicates' : cache(
+                    count('cache', 'predicate lookups') - created, created
+                ),
+                'signatures' : cache(
+                    count('cache', 'signature lookups') - computed, computed
+                ),
+                'solutions memo' : cache(
+                    count('cache', 'memo hits'), count('cache', 'memo misses')
+                )
+            }
+        }
+
+    def write_json(self, output):
+        json.dump(self.get_report(), output, indent=2)
+        output.write('\n')
+
+    def write_table(self, output):
+        report = self.get_report()
+        lines = ["%-36s %10s %12s" % ("hot path", "calls", "seconds")]
+        for name, c in report['calls'].items():
+            lines.append("%-36s %10d %12.6f" % (
+                name, c['calls'], c['seconds']
+            ))
+        lines.append("")
+        lines.append("%-36s %10s %10s %12s" % (
+            "result", "created", "applied", "seconds"
+        ))
+        for name, r in report['results'].items():
+            lines.append("%-36s %10d %10d %12.6f" % (
+                name, r['created'], r['applied'], r['seconds']
+            ))
+        lines.append("")
+        for name, value in report['counters'].items():
+            lines.append("%-36s %10d" % (name, value))
+        lines.append("")
+        lines.append("%-36s %10s %10s %10s" % (
+            "cache", "hits", "misses", "hit rate"
+        ))
+        for name, c in report['caches'].items():
+            lines.append("%-36s %10d %10d %10s" % (
+                name, c['hits'], c['misses'],
+                "-" if c['hit_rate'] is None else "%.1f%%" % (
+                    100 * c['hit_rate']
+                )
+            ))
+        output.write('\n'.join(lines) + '\n')
+
+
+if __name__ == '__main__':
+    pass
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from src.LogicalValues import T, F, U, Undefined
-import src.Solution
+from src.Exceptions import IncoherenceError
 
 ################################################################################
 #                                Result classes                                #
@@ -9,11 +9,46 @@ import src.Solution
 
 ################################## Base Result #################################
 
+class SolvedStates:
+    """
+    Mapping of predicates to their state, solving them on access (see
+    Result.value_from_states()).
+    """
+
+    def __getitem__(self, pred):
+        return pred.evaluate().value
+
+
+
+# Names of the slots set by the instances of each Result subclass (see
+# Result.bind()).
+slot_names = {}
+
+
+def sort_results(results):
+
+    """
+    Returns the given results as a list, in an order only depending on the
+    rules (their kinds, then the ids of their sources), so the results
+    applied first don't depend on the memory layout.
+    """
+
+    return sorted(
+        results,
+        key=lambda r: (type(r).__name__, [s.id for s in r.sources()])
+    )
+
+
 class Result:#(metaclass=ResultMemoizeMetaclass):
     """
     Base result class.
     """
 
+    __slots__ = ('value', 'pred', 'context')
+
+    # True for the results applying a rule of the knowledge base.
+    from_rule = False
+
     def __init__(self, pred, value=Undefined):
         """
         pred argument is the predicate the instance permits the deduction.
@@ -21,78 +56,66 @@ class Result:#(metaclass=ResultMemoizeMetaclass):
         Other arguments (parent predicate, value...) may be added with
         subclassing.
 
-        Results values aren't determined by default, to be solved, the solve()
-        method must be called to do so.
+        Results values aren't determined by default, the engines deduce them
+        from the states of their sources (see value_from_states()).
         """
-        self.used = False
         self.value = value
         self.pred = pred
-        self.displayed = False
+        self.context = None
 
-        
-    def get_solution(self):
+    def bind(self, value, context):
         """
-        This method generates the reasonning (Solution instance) to deduce the
-        current predicate's state.
-        It implementation may depend of the kind of result and the number of
-        parent results may vary.
+        Returns a copy of the result holding the value it has in the given
+        evaluation context (see src.Context), the result itself is left
+        untouched so it can be shared by every context.
         """
-        self.solve()
-        solution = src.Solution.Solution(self, self.srcpred.solve())
-        return solution
-            
-    def solve(self, verbose=False, debug=False):
-        """
-        If the result's value isn't determined, the solve method deduces it,
-        sets the determined attribute to True, sets the found value and
-        returns it.
 
-        ??? Should a flag be used to avoid repeating the displaying of an
-        already displayed result in case of verbose output. ???
+        cls = type(self)
+        names = slot_names.get(cls)
+        if names is None:
+            names = slot_names[cls] = [
+                name for c in cls.__mro__ for name in getattr(c, '__slots__', ())
+                if hasattr(self, name)
+            ]
+        result = cls.__new__(cls)
+        for name in names:
+            setattr(result, name, getattr(self, name))
+        result.value = value
+        result.context = context
+        return result
+
+    def follows_rule(self, states):
+        """
+        Returns True if the result deduces its predicate in the direction of
+        the rules, given the current states (see
+        src.ForwardChaining.Propagator.next_defaults()).
+        """
 
-        This method calls the solvesubmethod method.
+        return self.from_rule
 
-        It also handles the used attribute before calling it.
+    def state_of(self, pred):
+        """
+        Returns the state of pred in the context the result was bound to,
+        to explain the result with.
         """
 
-        if self.used:
-            return self.value
-        self.used = True
-        if self.value == Undefined or self.value == U:
-            self.value = self.solvesubmethod(verbose, debug)
-        self.used = False
-        return self.value
+        return pred.evaluate(self.context).value
 
-    def make_display_text(self, verbose, debug):
-        if self.displayed == True:
-            return ''
-        self.displayed == True
-        if hasattr(self, 'twinpred'):
-            res = "{}\n\n{}\n\n{}".format(
-                self.srcpred.make_display_text(
-                    verbose,
-                    debug
-                ).replace('\n', '\n  '),
-                self.twinpred.make_display_text(
-                    verbose,
-                    debug
-                ).replace('\n', '\n  '),
-                str(self)
-            )
-        else:
-            res = "{}\n\n{}".format(
-                self.srcpred.make_display_text(
-                    verbose,
-                    debug
-                ).replace('\n', '\n  '),
-                str(self)
-            )
-        return res
-        
-    def solvesubmethod(self, verbose, debug):
+    def sources(self):
+        """
+        This method must return the predicates the result's value is deduced
+        from.
+        """
+        raise NotImplementedError
+
+    def value_from_states(self, states):
         """
-        This method must compute and return the
-        result's value.
+        This method must return the result's value given the states of its
+        sources (states maps predicates to their LogicalValue and must return
+        Undefined for unknown predicates).
+
+        It doesn't solve anything, the engines compute the states by
+        themselves (see src.ForwardChaining).
         """
         raise NotImplementedError
 
@@ -107,71 +130,59 @@ class ParentResult(Result):
     """
     Result subclass to represent a result deduced from a parent predicate.
     (e.g.: We can deduce that A is True from !A being False).
+
+    The other operands of the parent predicate (twinpreds) are taken as a
+    whole : A is deduced from A + B + C and B + C.
     """
 
+    __slots__ = ('srcpred', 'twinpreds')
+
     def __init__(self, pred, srcpred):
         super().__init__(pred)
         self.srcpred = srcpred
-        if (isinstance(self, NotParentResult)
-            or (self.srcpred.p1 is self.srcpred.p2
-                and self.srcpred.p1 is self)):
-            self.twinpred = None
-        elif not self.srcpred.p1 is self:
-            self.twinpred = self.srcpred.p1
-        elif not self.srcpred.p2 is self:
-            self.twinpred = self.srcpred.p2
-
-
-    def value_from_srcpred(self):
+        twinpreds = list(srcpred.list_childs())
+        twinpreds.remove(pred)
+        if all(p is pred for p in twinpreds):
+            # A ^ A is deduced from A alone.
+            twinpreds = ()
+        self.twinpreds = tuple(twinpreds)
+
+    def follows_rule(self, states):
         """
-        get the value the instance should have from the source predicate.
+        A parent already solved while some of its operands aren't got its
+        state from a rule (or from a parent of its own), not from them : its
+        operands wait for each other if the default value of the twins would
+        make the predicate TRUE (e.g. A and B in a TRUE A | B). Otherwise
+        (e.g. in a FALSE A + B), they take their default values together.
         """
 
+        return self.conv_table.get((states[self.srcpred], F)) == T
+
+    def sources(self):
+        return (self.srcpred,) + self.twinpreds
+
+    def value_from_states(self, states):
         key = (
-            self.srcpred.solve(),
-            self.twinpred.solve() if self.twinpred else None
+            states[self.srcpred],
+            self.srcpred.fold_states(self.twinpreds, states)
         )
         if key in self.error_cases:
             raise IncoherenceError
-        return self.conv_table[key]
+        return self.conv_table.get(key, Undefined)
         
-    def solvesubmethod(self, verbose, debug):
-        if self.value != Undefined and self.value != U:
-            return self.value
-        self.value = self.value_from_srcpred()
-        return self.value
-
-            
-    def __len__(self):
-        
-        #if self.length != None:
-        #    return self.length
-        reasonning_to_follow = self.srcpred.get_reasonning_to_follow()
-        if reasonning_to_follow == None:
-            return 0
-        srclen = len(reasonning_to_follow)
-        if self.twinpred != None:
-            twinlen = len(twinpred.get_reasonning_to_follow())
-            self.length = max(srclen, twinlen) + 1
-        else: # Not case
-            self.length = srclen + 1
-        return self.length
-
     def __str__(self):
         res = "{srcpred} is {srcval}, therefore {pred} is {val}"
         vals = {}
         vals['srcpred'] = self.srcpred
-        vals['srcval'] = self.srcpred.solve().result.value
+        vals['srcval'] = self.state_of(self.srcpred)
         vals['pred'] = self.pred
-        vals['val'] = self.solve()
-        if not (isinstance(self.srcpred, src.Predicates.NotPredicate)
-                or self.srcpred.p1 is self.srcpred.p2):
-            if self.srcpred.p1 is self:
-                vals['twinpred'] = self.srcpred.p2
-            else:
-                vals['twinpred'] = self.srcpred.p1
-            vals['twinval'] = twinpred.solve()
-            res = "{twinpred} is {twinval} and " + res
+        vals['val'] = self.value
+        if self.twinpreds:
+            vals['twins'] = ', '.join(
+                '{} is {}'.format(p, self.state_of(p))
+                for p in self.twinpreds
+            )
+            res = "{twins} and " + res
         return res.format(**vals)
 
     
@@ -181,6 +192,8 @@ class NotParentResult(ParentResult):
     ParentResult subclass for NOT particular case.
     """
 
+    __slots__ = ()
+
     conversion_table = {
         Undefined : Undefined,
         U : U,
@@ -188,17 +201,19 @@ class NotParentResult(ParentResult):
         T : F
     }
 
-    #def __len__(self):
-    #    return super(Result, self).__len__()
+    def follows_rule(self, states):
+        return self.conversion_table[states[self.srcpred]] == T
     
-    def value_from_srcpred(self):
-        return self.conversion_table[self.srcpred.solve().result.value]
+    def value_from_states(self, states):
+        return self.conversion_table[states[self.srcpred]]
 
     
 class AndParentResult(ParentResult):
     """
     ParentResult subclass for AND particular case.
     """
+
+    __slots__ = ()
     # (src, twin)
     
     error_cases = (
@@ -221,7 +236,7 @@ class AndParentResult(ParentResult):
         (F, F) : U,
         (F, T) : F,
         (F, None) : F,
-        (T, Undefined) : Undefined,
+        (T, Undefined) : T,
         (T, U) : T,
         (T, T) : T,
         (T, None) : T,
@@ -233,6 +248,8 @@ class OrParentResult(ParentResult):
     ParentResult subclass for OR particular case.
     """
 
+    __slots__ = ()
+
     # (src, twin)
     
     error_cases = (
@@ -249,9 +266,9 @@ class OrParentResult(ParentResult):
         (U, Undefined) : Undefined,
         (U, U) : U,
         (U, F) : U,
-        (U, T) : T,
+        (U, T) : U,
         (U, None) : U,
-        (F, Undefined) : Undefined,
+        (F, Undefined) : F,
         (F, U) : F,
         (F, F) : F,
         (F, None) : F,
@@ -268,6 +285,8 @@ class XorParentResult(ParentResult):
     ParentResult subclass for XOR particular case.
     """
 
+    __slots__ = ()
+
     # (src, twin)
 
     error_cases = (
@@ -300,28 +319,30 @@ class ChildResult(Result):
     """
     Result subclass to solve a composed predicate from its childs.
     """
+
+    __slots__ = ('atomic_childs',)
     
     def __init__(self, pred):
         super().__init__(pred)
-        self.atomic_childs = self.pred.list_atomic_preds()
+        self.atomic_childs = sorted(
+            self.pred.list_atomic_preds(), key=lambda p: p.name
+        )
 
-    def get_solution(self):
-        return src.Solution.Solution(self, *[a.solve() for a in self.pred.list_atomic_preds()])
-        
-    def solvesubmethod(self, verbose, debug):
-        if self.value == F or self.value == T:
-            return self.value
-        for a in self.atomic_childs:
-            a.solve()
-        self.value = self.pred.get_state()
+    def sources(self):
+        return self.pred.list_childs()
+
+    def value_from_states(self, states):
+        return self.pred.get_state_from(states)
 
     def __str__(self):
-        res = ''.join([
-            '{pred} is {value}, '.format(pred=pred, value=pred.solve())
+        res = ', '.join([
+            '{pred} is {value}'.format(
+                pred=pred, value=self.state_of(pred)
+            )
             for pred in self.atomic_childs
         ])
         res = res + ", therefore {pred} is {predval}".format(
-            pref=self.pred, predval=self.pred.get_state()
+            pred=self.pred, predval=self.value
         )
         return res
 
@@ -333,27 +354,27 @@ class EquivalenceResult(Result):
     Class to represent a result from an equivalence.
     """
 
+    __slots__ = ('srcpred',)
+
     def __init__(self, pred, srcpred):
         super().__init__(pred)
         self.srcpred = srcpred
     
-    def solvesubmethod(self, verbose, debug):
-        if self.value != None and self.value != U:
-            return self.value
-        srcstate = self.srcpred.solve(verbose, debug)
-        self.value = srcstate
-        return self.value
-        
+    def sources(self):
+        return (self.srcpred,)
+
+    def value_from_states(self, states):
+        return states[self.srcpred]
     
     def __str__(self):
-        res = ("{srcpred} <=> {pred} ({reason}) and {srcpred} is {srcval},"
+        res = ("{srcpred} <=> {pred} ({reason}) and {srcpred} is {srcval}, "
                "therefore {pred} is {val}.")
         vals = {}
-        val['srcpred'] = self.srcpred
-        val['pred'] = self.pred
-        val['srcval'] = self.srcpred.solve()
-        val['val'] = self.pred.solve()
-        val['reason'] = self.reason
+        vals['srcpred'] = self.srcpred
+        vals['pred'] = self.pred
+        vals['srcval'] = self.state_of(self.srcpred)
+        vals['val'] = self.value
+        vals['reason'] = self.reason
         return res.format(**vals)
     
     
@@ -363,6 +384,8 @@ class DeducedEquivalenceResult(EquivalenceResult):
     deduced.
     """
 
+    __slots__ = ()
+
     reason = "logically deduced"
 
     
@@ -372,6 +395,10 @@ class DefinedEquivalenceResult(EquivalenceResult):
     the parsed file.
     """
 
+    __slots__ = ()
+
+    from_rule = True
+
     reason = "previously defined"
 
     
@@ -380,6 +407,10 @@ class ImplicationResult(Result):
     Result subclass to represent result deduced from an implication.
     """
 
+    __slots__ = ('srcpred',)
+
+    from_rule = True
+
     values = {
         T : T,
         U : U,
@@ -392,17 +423,11 @@ class ImplicationResult(Result):
         super().__init__(pred)
         self.srcpred = srcpred
 
-    def value_from_srcpred(self, srcstate):
-        return self.values[srcstate.result.value]
-    
-    def solvesubmethod(self, verbose, debug):
-        if self.value != None and self.value != Undefined and self.value != U:
-            return self.value
-        srcstate = self.srcpred.solve(verbose, debug)
-        if srcstate == None:
-            return Undefined
-        self.value = self.value_from_srcpred(srcstate)
-        return self.value
+    def sources(self):
+        return (self.srcpred,)
+
+    def value_from_states(self, states):
+        return self.values[states[self.srcpred]]
     
     def __str__(self):
         res = ("{srcpred} => {pred} and {srcpred} is {srcval}, therefore {pred}"
@@ -410,7 +435,7 @@ class ImplicationResult(Result):
         vals = {}
         vals['srcpred'] = self.srcpred
         vals['pred'] = self.pred
-        vals['srcval'] = self.srcpred.solve().result.value
+        vals['srcval'] = self.state_of(self.srcpred)
         vals['val'] = self.value
         #vals['reason'] = self.reason
         return res.format(**vals)
@@ -425,6 +450,8 @@ class IndirectImplicationResult(ImplicationResult):
     pred -> srcpred.
     """
 
+    __slots__ = ()
+
     values = {
         T : Undefined,
         U : U,
@@ -439,7 +466,7 @@ class IndirectImplicationResult(ImplicationResult):
         vals = {}
         vals['srcpred'] = self.srcpred
         vals['pred'] = self.pred
-        vals['srcval'] = self.srcpred.solve().result.val
+        vals['srcval'] = self.state_of(self.srcpred)
         vals['val'] = self.value
         #vals['reason'] = self.reason
         return res.format(**vals)
@@ -457,23 +484,18 @@ class DefaultResult(Result):
     complicated).
     """
 
+    __slots__ = ()
+
     def __init__(self, pred, value=F):
         super().__init__(pred, value=value)
-        
+
     def __len__(self):
         return 1
 
-    def make_display_text(self, verbose, debug):
-        if self.displayed == True:
-            return ''
-        self.displayed = True
-        return str(self)
+    def sources(self):
+        return ()
 
-    def get_solution(self):
-        solution = src.Solution.Solution(self)
-        return solution
-        
-    def solvesubmethod(self):
+    def value_from_states(self, states):
         return self.value
     
     def __str__(self):
@@ -490,25 +512,20 @@ class DefinedResult(Result):
     (It should be created during the parsing).
     """
 
+    __slots__ = ()
+
     def __init__(self, pred, value):
         super().__init__(pred, value=value)
 
     def __len__(self):
         return 1
 
-    def make_display_text(self, verbose, debug):
-        if self.displayed == True:
-            return ''
-        self.displayed = True
-        return str(self)
+    def sources(self):
+        return ()
 
-    def solvesubmethod(self):
+    def value_from_states(self, states):
         return self.value
 
-    def get_solution(self):
-        solution = src.Solution.Solution(self)
-        return solution
-    
     def get_characteristics(self):
         return {
             'result' : self,
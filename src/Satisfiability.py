@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+
+import heapq
+from src.LogicalValues import T, F, U
+from src.Exceptions import IncoherenceError
+import src.Predicates
+
+################################################################################
+#                                 CDCL solver                                  #
+################################################################################
+
+class CdclSolver:
+
+    """
+    Conflict driven clause learning SAT solver.
+
+    Variables are numbered from 1 (see new_var()) and literals are signed
+    variables (-v is the negation of v). Clauses are lists of literals, the
+    two first ones being watched. Conflicts are analyzed up to their first
+    unique implication point, the learned clause is kept and the solver
+    backjumps. Branching variables are the most active ones (VSIDS) with
+    their last value (phase saving), and the search restarts after a growing
+    number of conflicts.
+
+    solve() takes assumptions (literals decided first) instead of unit
+    clauses, so the same solver decides many queries against the same
+    clauses, and keeps the clauses learned for the next calls.
+    """
+
+    activity_decay = 0.95
+    first_restart = 100
+    restart_growth = 1.5
+
+    def __init__(self):
+        # by variable, index 0 being unused.
+        self.assigns = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # clauses watching each literal (see propagate()).
+        self.watches = {}
+        self.learned = []
+        self.trail = []
+        # trail length at each decision level.
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.increment = 1.0
+        self.conflicts = 0
+        # True once the clauses are unsatisfiable whatever the assumptions.
+        self.inconsistent = False
+        self.model = None
+
+    def new_var(self):
+        self.assigns.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        var = len(self.assigns) - 1
+        heapq.heappush(self.heap, (0.0, var))
+        return var
+
+    def value(self, lit):
+
+        """
+        Returns the value of a literal (True, False or None if its variable
+        isn't assigned).
+        """
+
+        value = self.assigns[abs(lit)]
+        if value is None or lit > 0:
+            return value
+        return not value
+
+    def add_clause(self, lits):
+
+        """
+        Adds a clause (an iterable of literals), between two calls of solve().
+        """
+
+        clause = []
+        for lit in set(lits):
+            value = self.value(lit)
+            if -lit in lits or value is True:
+                return
+            if value is None:
+                clause.append(lit)
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.inconsistent = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = lit > 0
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+
+        """
+        Assigns the literals implied by the clauses left with a single
+        unassigned literal, and returns a conflicting clause or None.
+        """
+
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches.get(false_lit, [])
+            kept = []
+            for i, clause in enumerate(watchers):
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) is True:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) is False:
+                        kept.extend(watchers[i + 1:])
+                        self.watches[false_lit] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+            self.watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+
+        """
+        Returns the clause learned from a conflict (its first literal being
+        the negation of the first unique implication point) and the level to
+        backjump to.
+        """
+
+        level = len(self.trail_lim)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for lit in clause:
+                var = abs(lit)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        pending += 1
+                    else:
+                        learned.append(lit)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.reasons[abs(lit)]
+        learned[0] = -lit
+        if len(learned) == 1:
+            return learned, 0
+        # the literal of the highest level is watched with the asserted one.
+        i = max(
+            range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])]
+        )
+        learned[1], learned[i] = learned[i], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [
+                (-a, v) for v, a in enumerate(self.activity)
+                if v and self.assigns[v] is None
+            ]
+            heapq.heapify(self.heap)
+        elif self.assigns[var] is None:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phases[var] = lit > 0
+            self.assigns[var] = None
+            self.reasons[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
+
+    def pick_branch(self):
+
+        """
+        Returns the literal to decide next, or None if every variable is
+        assigned. The heap may hold stale entries, they are skipped.
+        """
+
+        while self.heap:
+            var = heapq.heappop(self.heap)[1]
+            if self.assigns[var] is None:
+                return var if self.phases[var] else -var
+        return None
+
+    def solve(self, assumptions=()):
+
+        """
+        Returns True if the clauses are satisfiable with the assumptions
+        (literals), the model (values by variable) being stored in the model
+        attribute, False otherwise.
+        """
+
+        if self.inconsistent:
+            return False
+        restart = self.first_restart
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.inconsistent = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                    self.enqueue(learned[0], learned)
+                self.increment /= self.activity_decay
+                continue
+            if conflicts >= restart:
+                self.backtrack(0)
+                restart *= self.restart_growth
+                conflicts = 0
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                lit = assumptions[level]
+                value = self.value(lit)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                # an assumption already true still takes its level.
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.enqueue(lit, None)
+                continue
+            lit = self.pick_branch()
+            if lit is None:
+                self.model = list(self.assigns)
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(lit, None)
+
+
+################################################################################
+#                             Entailment engine                                #
+################################################################################
+
+class SatEngine:
+
+    """
+    Decides predicates of a knowledge base by satisfiability instead of
+    propagating results : the rules are encoded into clauses once (see
+    literal()), and a predicate is TRUE if the facts entail it, FALSE if they
+    entail its negation.
+
+    Atomic predicates that are neither facts nor part of a conclusion the
+    rules can draw (see conclusions(), a rule whose premise is FALSE draws
+    none) can only take their default value, they are assumed FALSE. A
+    predicate entailed neither way is UNDETERMINED if it is an atom of a '|'
+    or a '^' of an entailed conclusion (e.g. C of A => B | C with A TRUE),
+    FALSE (its default) otherwise.
+
+    The facts are given as assumptions (see CdclSolver.solve()), so the
+    clauses learned while deciding a query speed up the following ones,
+    whatever their facts.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.solver = CdclSolver()
+        self.literals = {}
+        # (premise, conclusion) of each '=>', and sides of each '<=>' both
+        # ways (see conclusions()).
+        self.implications = []
+        self.equivalences = []
+        # (atoms, atoms under one of its '|' or '^') by rule side.
+        self.conclusion_atoms = {}
+        for p in kb.list_predicates():
+            for q in p.self_implies:
+                self.solver.add_clause((-self.literal(p), self.literal(q)))
+                self.implications.append((p, q))
+            for q in p.defined_eqs:
+                self.solver.add_clause((-self.literal(p), self.literal(q)))
+                self.equivalences.append((p, q))
+        for p, q in self.implications + self.equivalences:
+            self.conclusion_atoms[q] = self.list_atoms(q)
+
+    def list_atoms(self, pred):
+        atoms, choices = set(), set()
+        stack = [(pred, False)]
+        while stack:
+            p, disjunctive = stack.pop()
+            if isinstance(p, src.Predicates.AtomicPredicate):
+                atoms.add(p)
+                if disjunctive:
+                    choices.add(p)
+            disjunctive = disjunctive or isinstance(
+                p, (src.Predicates.OrPredicate, src.Predicates.XorPredicate)
+            )
+            stack.extend((c, disjunctive) for c in p.list_childs())
+        return atoms, choices
+
+    def conclusions(self, facts, refuted=()):
+
+        """
+        Returns the (premise, conclusion) rules that can conclude something
+        from the given facts, the refuted ones (whose premise is FALSE) left
+        aside : every '=>', and a side of a '<=>' if an atom of its other
+        side is a fact or in a conclusion of another rule (e.g. F of D => E
+        and E ^ A <=> F, but not E ^ A, so A keeps its default value).
+        """
+
+        # rules concluding each atom, None standing for every '=>'.
+        rules = {}
+
+        def conclude(pred, rule):
+            for atom in self.conclusion_atoms[pred][0]:
+                rules.setdefault(atom, set()).add(rule)
+
+        drawn = [rule for rule in self.implications if rule not in refuted]
+        for p, q in drawn:
+            conclude(q, None)
+        while True:
+            equivalences = [
+                (p, q) for p, q in self.equivalences
+                if (p, q) not in refuted and (p, q) not in drawn and any(
+                    atom in facts
+                    or rules.get(atom, set()) - {frozenset((p, q))}
+                    for atom in self.conclusion_atoms[p][0]
+                )
+            ]
+            if not equivalences:
+                return drawn
+            for p, q in equivalences:
+                drawn.append((p, q))
+                conclude(q, frozenset((p, q)))
+
+    def literal(self, pred):
+
+        """
+        Returns the literal standing for pred, encoding it first if needed :
+        a parent predicate gets a variable constrained to be its operator
+        applied to the literals of its operands (Tseitin encoding), a
+        negation is the negated literal of its operand.
+        """
+
+        stack = [pred]
+        while stack:
+            p = stack[-1]
+            if p in self.literals:
+                stack.pop()
+                continue
+            missing = [c for c in p.list_childs() if c not in self.literals]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            self.literals[p] = self.encode(p)
+        return self.literals[pred]
+
+    def encode(self, pred):
+        if isinstance(pred, src.Predicates.AtomicPredicate):
+            return self.solver.new_var()
+        if isinstance(pred, src.Predicates.NotPredicate):
+            return -self.literals[pred.p]
+        operands = [self.literals[p] for p in pred.operands]
+        if isinstance(pred, src.Predicates.XorPredicate):
+            lit = operands[0]
+            for operand in operands[1:]:
+                lit = self.encode_xor(lit, operand)
+            return lit
+        var = self.solver.new_var()
+        if isinstance(pred, src.Predicates.AndPredicate):
+            var, operands = -var, [-o for o in operands]
+        # var <=> operand1 | operand2 | ...
+        for operand in operands:
+            self.solver.add_clause((var, -operand))
+        self.solver.add_clause([-var] + operands)
+        return var if isinstance(pred, src.Predicates.OrPredicate) else -var
+
+    def encode_xor(self, a, b):
+        var = self.solver.new_var()
+        self.solver.add_clause((-var, a, b))
+        self.solver.add_clause((-var, -a, -b))
+        self.solver.add_clause((var, -a, b))
+        self.solver.add_clause((var, a, -b))
+        return var
+
+    def make_assumptions(self, facts, concluded):
+
+        """
+        Returns the literals of the facts and of the default values of the
+        atoms no conclusion frees. If these default values contradict the
+        rules (e.g. G <=> !H), they are assumed one at a time, by atom name,
+        the ones contradicting the previous ones being left free (H is TRUE).
+        """
+
+        atoms = self.kb.get_instances(src.Predicates.AtomicPredicate).values()
+        assumptions = [self.literal(p) for p in facts]
+        defaults = [
+            -self.literal(p) for p in sorted(atoms, key=lambda p: p.name)
+            if p not in facts and p not in concluded
+        ]
+        if (self.solver.solve(assumptions + defaults)
+            or not self.solver.solve(assumptions)):
+            return assumptions + defaults
+        for lit in defaults:
+            if self.solver.solve(assumptions + [lit]):
+                assumptions.append(lit)
+        return assumptions
+
+    def make_entailment(self, assumptions):
+
+        """
+        Returns a function telling if the given assumptions entail a literal,
+        raises an IncoherenceError if they contradict the rules.
+        """
+
+        if not self.solver.solve(assumptions):
+            raise IncoherenceError
+        # models found so far, a literal false in one of them isn't entailed.
+        models = [self.solver.model]
+        entailed = {}
+
+        def is_entailed(lit):
+            if lit not in entailed:
+                if any(m[abs(lit)] != (lit > 0) for m in models):
+                    entailed[lit] = False
+                elif self.solver.solve(assumptions + [-lit]):
+                    models.append(self.solver.model)
+                    entailed[lit] = False
+                else:
+                    entailed[lit] = True
+            return entailed[lit]
+
+        return is_entailed
+
+    def solve(self, queries, facts=None):
+
+        """
+        Returns a dict mapping the given predicates to their values, facts
+        being the atomic predicates set TRUE (the knowledge base's facts by
+        default). Raises an IncoherenceError if the facts contradict the
+        rules.
+        """
+
+        literals = [self.literal(q) for q in queries]
+        facts = set(self.kb.facts if facts is None else facts)
+        refuted = set()
+        while True:
+            rules = self.conclusions(facts, refuted)
+            concluded = set()
+            # conclusions by atom under one of their '|' or '^'.
+            choices = {}
+            for p, q in rules:
+                atoms, choice_atoms = self.conclusion_atoms[q]
+                concluded.update(atoms)
+                for atom in choice_atoms:
+                    choices.setdefault(atom, set()).add(q)
+            assumptions = self.make_assumptions(facts, concluded)
+            is_entailed = self.make_entailment(assumptions)
+            # the atoms freed by a rule whose premise is FALSE keep their
+            # default value (C of A + B => C if A or B is FALSE).
+            newly_refuted = [
+                (p, q) for p, q in rules if is_entailed(-self.literals[p])
+            ]
+            if not newly_refuted:
+                break
+            refuted.update(newly_refuted)
+        states = {}
+        for q, lit in zip(queries, literals):
+            if is_entailed(lit):
+                value = T
+            elif is_entailed(-lit):
+                value = F
+            else:
+                value = None
+            if value is None:
+                value = U if any(
+                    is_entailed(self.literals[c])
+                    for c in choices.get(q, ())
+                ) else F
+            states[q] = value
+        return states
+
+
+if __name__ == '__main__':
+    pass
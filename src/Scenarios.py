@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+import json
+import string
+import sys
+from src.LogicalValues import T, F, values
+from src.Exceptions import IncoherenceError
+import src.Context
+import src.ForwardChaining
+import src.Satisfiability
+import src.Parallel
+
+################################################################################
+#                                 Scenarios                                    #
+################################################################################
+
+# A scenarios file holds one JSON object per line, with the initial facts and
+# the queries written as in a rule file, e.g. :
+# {"facts": "=AB", "queries": "?CD"}
+# Every other key (an id for instance) is copied to the output line. The
+# atoms the rules don't name are TRUE if they are facts, FALSE otherwise.
+
+
+def read_scenarios(filename):
+
+    """
+    Yields the scenarios of the given file, one at a time.
+    """
+
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def letters(s, prefix):
+
+    """
+    Returns the atomic predicates names of a facts or queries string.
+    """
+
+    s = ''.join(s.split())
+    return s[1:] if s.startswith(prefix) else s
+
+
+def is_valid_scenario(scenario):
+
+    """
+    Returns True if scenario is an object whose facts and queries are strings
+    only naming atomic predicates (upper case letters).
+    """
+
+    if not isinstance(scenario, dict):
+        return False
+    for key, prefix in (('facts', '='), ('queries', '?')):
+        names = scenario.get(key, '')
+        if not isinstance(names, str):
+            return False
+        if not set(letters(names, prefix)) <= set(string.ascii_uppercase):
+            return False
+    return True
+
+
+def find_atoms(kb, names):
+
+    """
+    Returns a dict mapping the given names to the atomic predicates of kb, or
+    to None for the atoms the rules don't name : they are TRUE if they are
+    facts, FALSE otherwise (see unnamed_value()). No predicate is created, so
+    the scenarios don't grow the knowledge base shared by the workers.
+    """
+
+    return {name : kb.find_atom(name) for name in names}
+
+
+def unnamed_value(name, facts):
+    return str(T if name in facts else F)
+
+
+class ScenarioRunner:
+
+    """
+    Solves scenarios against a knowledge base : only the facts and the
+    computed values are reset between two scenarios, the predicates, their
+    equivalences and results are kept.
+
+    With the backward engine, the results are built once and each scenario
+    is solved in an evaluation context (see src.Context) : the runner's own
+    one, holding the batch of scenarios solved so far, whose facts differing
+    from the previous scenario are asserted or retracted so the values not
+    depending on them are kept (see EvaluationContext.set_facts()), or a new
+    one per scenario if isolated is True, so no state is kept between them.
+    """
+
+    def __init__(self, kb, engine='backward', isolated=False):
+        self.kb = kb
+        self.chainer = None
+        self.isolated = isolated
+        if engine == 'forward':
+            self.chainer = src.ForwardChaining.ForwardChainer(kb)
+        else:
+            # built once, before workers may be forked (see run_scenarios()).
+            kb.build_results()
+            self.context = src.Context.EvaluationContext(kb, ())
+
+    def solve(self, facts, queries):
+
+        """
+        Returns a dict mapping the queried names to their values.
+        """
+
+        kb = self.kb
+        atoms = find_atoms(kb, set(facts) | set(queries))
+        preds = [atoms[f] for f in facts if atoms[f] is not None]
+        if self.chainer:
+            kb.reset_facts()
+            for pred in preds:
+                pred.set_initial_state()
+            self.chainer.run()
+            context = kb.context
+        elif self.isolated:
+            context = src.Context.EvaluationContext(kb, preds)
+        else:
+            context = self.context
+            context.set_facts(preds)
+        return {
+            q : str(atoms[q].evaluate(context).value)
+            if atoms[q] is not None else unnamed_value(q, facts)
+            for q in queries
+        }
+
+
+class CompactScenarioRunner:
+
+    """
+    Solves scenarios against a CompactGraph.
+
+    The atoms no rule names aren't in the graph : they are TRUE if they are
+    facts, FALSE otherwise.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.ids = graph.atom_ids()
+
+    def solve(self, facts, queries):
+        facts = set(facts)
+        states = self.graph.solve([self.ids[f] for f in facts if f in self.ids])
+        return {
+            q : str(values[states[self.ids[q]]]) if q in self.ids
+            else unnamed_value(q, facts)
+            for q in queries
+        }
+
+
+class SatScenarioRunner:
+
+    """
+    Solves scenarios with a single SatEngine, so the clauses learned for a
+    scenario are reused by the next ones.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.engine = src.Satisfiability.SatEngine(kb)
+
+    def solve(self, facts, queries):
+        atoms = find_atoms(self.kb, set(facts) | set(queries))
+        states = self.engine.solve(
+            [atoms[q] for q in queries if atoms[q] is not None],
+            [atoms[f] for f in facts if atoms[f] is not None]
+        )
+        return {
+            q : str(states[atoms[q]])
+            if atoms[q] is not None else unnamed_value(q, facts)
+            for q in queries
+        }
+
+
+def run_scenario(runner, scenario):
+
+    """
+    Solves a scenario and returns its output object.
+    """
+
+    if not is_valid_scenario(scenario):
+        output = dict(scenario) if isinstance(scenario, dict) else {}
+        output['error'] = 'invalid scenario'
+        return output
+    output = dict(scenario)
+    try:
+        output['results'] = runner.solve(
+            letters(scenario.get('facts', ''), '='),
+            letters(scenario.get('queries', ''), '?')
+        )
+    except IncoherenceError:
+        output['error'] = 'incoherent facts'
+    return output
+
+
+def dump_scenario(runner, scenario):
+    return json.dumps(run_scenario(runner, scenario))
+
+
+def run_scenarios(runner, filename, output=sys.stdout, jobs=1):
+
+    """
+    Solves every scenario of the file and writes one JSON line per scenario,
+    in the file order.
+
+    With several jobs, the scenarios are solved by forked workers sharing the
+    runner's knowledge base (see src.Parallel.map_in_workers()).
+    """
+
+    for line in src.Parallel.map_in_workers(
+            dump_scenario, runner, read_scenarios(filename), jobs
+    ):
+        output.write(line + '\n')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import src.Scenarios
+
+################################################################################
+#                                Query server                                  #
+################################################################################
+
+# Requests and responses are JSON lines : a request is a scenario (see
+# src.Scenarios), e.g. {"id": 1, "facts": "=AB", "queries": "?CD"}, and its
+# response is the scenario's output line. The responses of a connection are
+# written in its requests order, so several requests may be sent without
+# waiting for their responses.
+
+
+def is_valid_request(request):
+
+    """
+    Returns True if request is a scenario whose facts and queries only name
+    atomic predicates (see src.Scenarios.is_valid_scenario()).
+    """
+
+    return src.Scenarios.is_valid_scenario(request)
+
+
+class QueryServer:
+
+    """
+    Answers the requests of every connection with a single scenario runner,
+    so the rules are parsed and linked once.
+
+    The requests are micro-batched : the batcher (see run_batches()) takes
+    every request queued (max_batch at most) while the previous batch was
+    solved, and solves them in a worker thread, so the event loop keeps
+    reading requests meanwhile. Each request is solved in its own evaluation
+    context with the backward engine (see ScenarioRunner), so its response
+    doesn't depend on the requests solved before it.
+
+    Only the batcher uses the runner, so its knowledge base is never used by
+    two threads at once.
+    """
+
+    def __init__(self, runner, max_batch=64):
+        self.runner = runner
+        self.max_batch = max_batch
+        self.requests = asyncio.Queue()
+        self.batches = 0
+        self.solved = 0
+
+    def solve_batch(self, requests):
+
+        """
+        Returns the outputs of the given requests, in their order.
+        """
+
+        return [
+            src.Scenarios.run_scenario(self.runner, request)
+            for request in requests
+        ]
+
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.requests.get()]
+            while len(batch) < self.max_batch and not self.requests.empty():
+                batch.append(self.requests.get_nowait())
+            requests = [request for request, future in batch]
+            try:
+                outputs = await loop.run_in_executor(
+                    None, self.solve_batch, requests
+                )
+            except Exception as e:
+                for request, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.solved += len(batch)
+            for (request, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    async def submit(self, line):
+
+        """
+        Queues the request of a line and returns a future of its response.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            future.set_result({'error' : 'invalid JSON'})
+            return future
+        if not is_valid_request(request):
+            future.set_result({'error' : 'invalid request'})
+            return future
+        await self.requests.put((request, future))
+        return future
+
+    async def write_responses(self, futures, writer):
+        while True:
+            future = await futures.get()
+            if future is None:
+                return
+            try:
+                response = await future
+            except Exception:
+                response = {'error' : 'internal error'}
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+
+        """
+        Reads the requests of a connection until it is closed and writes
+        their responses.
+        """
+
+        futures = asyncio.Queue()
+        responses = asyncio.create_task(self.write_responses(futures, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await futures.put(await self.submit(line))
+            await futures.put(None)
+            await responses
+        except ConnectionError:
+            responses.cancel()
+        finally:
+            writer.close()
+
+
+async def serve(runner, socket_path=None, host='127.0.0.1', port=8642,
+                max_batch=64):
+
+    """
+    Answers requests over the given Unix socket, or over TCP on host and port
+    if no socket is given, until the task is cancelled.
+    """
+
+    server = QueryServer(runner, max_batch)
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.handle, socket_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    batcher = asyncio.create_task(server.run_batches())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        batcher.cancel()
+
+
+if __name__ == '__main__':
+    pass
@@ -1,10 +1,74 @@
 #!/usr/bin/env python3
 
+import io
+import json
+
+def make_conclusion_text(result):
+
+    """
+    Returns the text concluding the reasonning of a predicate, given the
+    result its state was deduced from.
+    """
+
+    return '{result}\nTherefore, {pred} is {val}'.format(
+        result=result,
+        pred=result.pred,
+        val=result.value
+    )
+
+
+class ExplanationWriter:
+
+    """
+    Writes explanations to a file-like sink, indenting every line by two
+    spaces per indentation level (see indent()), empty lines being left
+    empty.
+
+    Text is written as soon as it is given, so explanations are streamed
+    instead of being built as a whole.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.depth = 0
+        # True until some text is written on the current line.
+        self.line_start = True
+
+    def write(self, text):
+        for i, line in enumerate(text.split('\n')):
+            if i:
+                self.sink.write('\n')
+                self.line_start = True
+            if line:
+                if self.line_start:
+                    self.sink.write('  ' * self.depth)
+                    self.line_start = False
+                self.sink.write(line)
+
+    def indent(self, text=''):
+        """
+        Enters a new indentation level and writes text in it.
+        """
+
+        self.depth += 1
+        self.write(text)
+
+    def dedent(self, text=''):
+        """
+        Leaves the current indentation level and writes text after it.
+        """
+
+        self.depth -= 1
+        self.write(text)
+
+
 class Solution:
     """
     This class contains the whole reasonning to deduce a predicate's state.
     """
 
+    __slots__ = ('result', 'length', 'parent_solutions', 'displayed')
+
     def __init__(self, result, *solutions):
         self.result = result
         self.length = max([s.length for s in solutions if s != None] or [0]) + 1
@@ -12,34 +76,151 @@ class Solution:
         self.displayed = False
         
     def make_display_text(self, verbose, debug):
+        output = io.StringIO()
+        self.write_display_text(ExplanationWriter(output), verbose, debug)
+        return output.getvalue()
+
+    def write_display_text(self, writer, verbose, debug):
+
+        """
+        Writes the reasonning (the parent solutions, indented, if verbose or
+        debug is True) and the conclusion with writer, an already displayed
+        solution writes nothing.
+
+        The solutions DAG is walked with an explicit stack of actions, so
+        deep reasonnings are streamed without recursion.
+        """
+
+        actions = [(None, (self, None))]
+        while actions:
+            write, argument = actions.pop()
+            if write is None:
+                # a solution, replaced by the actions writing it
+                solution, siblings = argument
+                actions.extend(reversed(solution.make_write_actions(
+                    writer, verbose, debug, siblings
+                )))
+            else:
+                write(argument)
+
+    def make_write_actions(self, writer, verbose, debug, siblings=None):
+
+        """
+        Returns the (write function, text) actions writing the solution, the
+        parent solutions being (None, (solution, siblings)) actions.
+
+        A parent solution is written indented, siblings being the list of the
+        parent solutions of the same solution already written (None for the
+        solution written first), so the ones already displayed elsewhere
+        leave no blank lines.
+        """
+
         if self.displayed:
-            return ''
+            return ()
         self.displayed = True
-        res = ''
+        actions = []
         if verbose or debug:
+            written = []
             for solution in self.parent_solutions:
-                res += (
-                    (
-                        '\n' if res else '  '
-                        + solution.make_display_text(verbose, debug)
-                    ).replace('\n', '\n  ')
-                    + '\n\n'
-                )
-        res += str(self.result)
-        res += '\nTherefore, {pred} is {val}'.format(
-            pred=self.result.pred,
-            val=self.result.solve()
-        )
-        return res
-                
-    def display(self, verbose, debug, indent=0):
-        if self.result.displayed:
-            return
-        if verbose or debug:
-            for solution in self.parent_solutions:
-                solution.display(verbose, debug, indent + 2)
-            print(self.result.replace('\n', '\n' + indent * ' '))
-            self.result.displayed = True
+                actions.append((None, (solution, written)))
+        actions.append((writer.write, make_conclusion_text(self.result)))
+        if siblings is not None:
+            actions.insert(0, (writer.indent, '\n' if siblings else ''))
+            actions.append((writer.dedent, '\n\n'))
+            siblings.append(self)
+        return actions
+
+
+class DagWriter:
+
+    """
+    Writes solutions to a file-like sink as a DAG of JSON lines : every
+    solution and result is written once, with an id its references use,
+    after everything it references. Records are :
+
+    {"id": 0, "type": "result", "kind": "DefinedResult", "predicate": "A",
+     "value": "TRUE", "text": "A was defined as TRUE"}
+    {"id": 1, "type": "solution", "result": 0, "parents": []}
+    {"type": "query", "predicate": "A", "value": "TRUE", "result": 0,
+     "solution": 1}
+
+    The solution of a query is omitted when only its result is written (see
+    write_query()).
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.ids = {}
+
+    def write_record(self, record):
+        self.sink.write(json.dumps(record) + '\n')
+
+    def write_result(self, result):
+
+        """
+        Writes result unless it already was, and returns its id.
+        """
+
+        if result not in self.ids:
+            self.ids[result] = len(self.ids)
+            self.write_record({
+                'id' : self.ids[result],
+                'type' : 'result',
+                'kind' : type(result).__name__,
+                'predicate' : str(result.pred),
+                'value' : str(result.value),
+                'text' : str(result)
+            })
+        return self.ids[result]
+
+    def write_solution(self, solution):
+
+        """
+        Writes solution and the solutions it depends on unless they already
+        were, and returns its id.
+
+        The DAG is walked depth first with an explicit stack.
+        """
+
+        stack = [solution]
+        while stack:
+            current = stack[-1]
+            if current in self.ids:
+                stack.pop()
+                continue
+            parents = [
+                s for s in current.parent_solutions if s not in self.ids
+            ]
+            if parents:
+                stack.extend(reversed(parents))
+                continue
+            stack.pop()
+            result_id = self.write_result(current.result)
+            self.ids[current] = len(self.ids)
+            self.write_record({
+                'id' : self.ids[current],
+                'type' : 'solution',
+                'result' : result_id,
+                'parents' : [self.ids[s] for s in current.parent_solutions]
+            })
+        return self.ids[solution]
+
+    def write_query(self, pred, result, solution=None):
+
+        """
+        Writes the record of a queried predicate, given the result its state
+        was deduced from and possibly its solution.
+        """
+
+        record = {
+            'type' : 'query',
+            'predicate' : str(pred),
+            'value' : str(result.value),
+            'result' : self.write_result(result)
+        }
+        if solution is not None:
+            record['solution'] = self.write_solution(solution)
+        self.write_record(record)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import numpy
+from src.LogicalValues import T, F, U, Undefined, values
+
+################################################################################
+#                                Truth tables                                  #
+################################################################################
+
+# States an atomic predicate can take when comparing predicates.
+atomic_states = numpy.array([F.code, T.code, U.code], dtype=numpy.uint8)
+
+
+def make_lookup_table(values_table, arity):
+
+    """
+    Converts a predicate class values_table (mapping LogicalValues, or tuples
+    of LogicalValues, to a LogicalValue) into a numpy array indexed by the
+    codes of the operands.
+    """
+
+    table = numpy.full(
+        (len(values),) * arity, Undefined.code, dtype=numpy.uint8
+    )
+    for key, value in values_table.items():
+        if arity == 1:
+            key = (key,)
+        table[tuple(k.code for k in key)] = value.code
+    return table
+
+
+def make_columns(atompreds):
+
+    """
+    Returns a dict mapping each given AtomicPredicate to a column holding its
+    state for every possible assignment (3 ** len(atompreds) rows).
+
+    The returned dict is also used by get_vector_state() to store the columns
+    of already evaluated sub-predicates.
+    """
+
+    grid = numpy.indices(
+        (len(atomic_states),) * len(atompreds), dtype=numpy.uint8
+    )
+    return {p: atomic_states[g.ravel()] for p, g in zip(atompreds, grid)}
+
+
+def make_signature(pred):
+
+    """
+    Returns a canonical semantic key of the predicate : two predicates have the
+    same signature if and only if they are equivalent.
+
+    The signature is made of the names of the atomic predicates the predicate
+    actually depends on (sorted), and of the bytes of its truth table over
+    these atomic predicates. Atomic predicates the state doesn't depend on
+    (e.g. B in A | (A + B)) are reduced out of the table.
+    """
+
+    atompreds = sorted(pred.list_atomic_preds(), key=lambda p: p.name)
+    table = pred.get_vector_state(make_columns(atompreds)).reshape(
+        (len(atomic_states),) * len(atompreds)
+    )
+    names = []
+    axis = 0
+    for p in atompreds:
+        first = table.take(0, axis=axis)
+        if numpy.all(table == numpy.expand_dims(first, axis)):
+            table = first
+        else:
+            names.append(p.name)
+            axis += 1
+    return (tuple(names), table.tobytes())
+
+
+if __name__ == '__main__':
+    pass
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
-import src.Predicates
 import re
+from src.Exceptions import ParseError
+import src.Predicates
+import src.KnowledgeBase
 
 ################################################################################
 #                                File parser                                   #
@@ -15,13 +17,13 @@ def clean_line(l):
 def is_empty_line(l):
     return(clean_line(l) == '')
 
-def parse_rules(f):
+def parse_rules(f, kb):
     flag = False
-    for line in f:
+    for number, line in enumerate(f, 1):
         if not is_empty_line(line):
             if not flag:
                 flag = True
-            parse_rule(clean_line(line))
+            parse_rule(line, kb, number)
         elif flag:
             return
 
@@ -29,128 +31,373 @@ def create_equivalence(p1, p2):
     p1.entity.merge(p2.entity)
     p1.defined_eqs.add(p2)
     p2.defined_eqs.add(p1)
+    p1.kb.rules_changed()
 
 def create_implication(p1, p2):
     p1.self_implies.add(p2)
     p2.is_implied_by.add(p1)
+    p1.kb.rules_changed()
 
+# Binary operators binding power, the higher the tighter (! binds tighter than
+# any of them). They are all right associative : A + B + C is A + (B + C).
 operators = {
-    '+' : (2, src.Predicates.AndPredicate),
-    '|' : (3, src.Predicates.OrPredicate),
-    '^' : (4, src.Predicates.XorPredicate)
+    '+' : (3, src.Predicates.AndPredicate),
+    '|' : (2, src.Predicates.OrPredicate),
+    '^' : (1, src.Predicates.XorPredicate)
 }
 
-def create_predicate(s):
-    p_depth = 0
-    op_index = None
-    i = 0
-    for c in s:
-        if c == '(':
-            p_depth += 1
-        elif c == ')':
-            if p_depth == 0:
-                raise Exception
-            p_depth -= 1  
-        elif (
-            c in operators.keys() and p_depth == 0
-            and (
-                op_index == None
-                or operators[c][0] > operators[s[op_index]][0]
+token_regex = re.compile(r'\s*(?:(<=>|=>|[A-Z+|^!()])|(#)|(\S))')
+
+def tokenize(s, line=None):
+
+    """
+    Yields the (token, column) pairs of a rule, columns starting at 1, then
+    a final (None, column) pair marking its end.
+
+    Blanks are skipped and a '#' starts a comment ending the rule.
+    """
+
+    end = 0
+    for match in token_regex.finditer(s):
+        token, comment, invalid = match.groups()
+        if comment:
+            break
+        if invalid:
+            raise ParseError(
+                "unexpected character {!r}".format(invalid),
+                line, match.start(3) + 1
             )
-        ):
-            op_index = i
-        i += 1
-    if p_depth > 0:
-        raise Exception
-    if op_index == None:
-
-
-
-        if s[0] == '!':
-            p = create_predicate(s[1:])
-            return src.Predicates.NotPredicate(p)
-        elif s[0] == '(' and s[-1] == ')':
-            return create_predicate(s[1:][:-1])
-        elif len(s) == 1 and s.isupper():
-            return src.Predicates.AtomicPredicate(s)
-        else:
-            raise Exception
-    else:
-        p1 = create_predicate(s[:op_index])
-        p2 = create_predicate(s[op_index + 1:])
-        return operators[s[op_index]][1](p1, p2)
-        
-        
-def parse_rule(l):
-    if l.find('<=>') != -1:
-        p = l.split('<=>')
-        if len(p) == 2:
-            p1 = create_predicate(p[0])
-            p2 = create_predicate(p[1])
-            create_equivalence(p1, p2)
+        yield token, match.start(1) + 1
+        end = match.end()
+    yield None, end + 1
+
+
+class RuleParser:
+
+    """
+    Parses a rule in a single pass over its tokens into syntax trees : an
+    atom is its name, a negation is ('!', operand) and a binary operation is
+    (operator, operand1, operand2). See make_predicate() to turn them into
+    predicates.
+
+    Expressions are parsed with the shunting-yard algorithm : operands are
+    pushed on a stack and operators wait on another one until an operator
+    binding less tightly (or the end of the expression) comes, so the rule is
+    never rescanned nor sliced and nesting doesn't recurse.
+    """
+
+    def __init__(self, s, line=None):
+        self.line = line
+        self.tokens = tokenize(s, line)
+        self.next()
+
+    def next(self):
+        self.token, self.column = next(self.tokens)
+
+    def error(self, message):
+        return ParseError(message, self.line, self.column)
+
+    def describe(self):
+        if self.token is None:
+            return 'end of rule'
+        return repr(self.token)
+
+    def parse_rule(self):
+
+        """
+        Returns the (premise, arrow, conclusion) of the rule, arrow being
+        '=>' or '<=>' and premise and conclusion syntax trees.
+        """
+
+        p1 = self.parse_expression()
+        arrow = self.token
+        if arrow not in ('=>', '<=>'):
+            raise self.error(
+                "expected '=>' or '<=>', found {}".format(self.describe())
+            )
+        self.next()
+        p2 = self.parse_expression()
+        if self.token is not None:
+            raise self.error(
+                "expected end of rule, found {}".format(self.describe())
+            )
+        return p1, arrow, p2
+
+    def parse_expression(self):
+
+        """
+        Returns the syntax tree of the expression starting at the current
+        token, and stops at the first token which can't continue it.
+        """
+
+        operands = []
+        pending = []  # (token, column) of the waiting operators
+        while True:
+            # an operand, possibly negated or parenthesized
+            while self.token == '!' or self.token == '(':
+                pending.append((self.token, self.column))
+                self.next()
+            if self.token is None or not self.token.isupper():
+                raise self.error(
+                    "expected a predicate, found {}".format(self.describe())
+                )
+            operands.append(self.token)
+            self.next()
+            self.reduce_negations(operands, pending)
+            while self.token == ')':
+                self.reduce(operands, pending, 0)
+                if not pending:
+                    raise self.error("unbalanced ')'")
+                pending.pop()
+                self.next()
+                self.reduce_negations(operands, pending)
+            # then an operator, or the end of the expression
+            if self.token not in operators:
+                break
+            self.reduce(operands, pending, operators[self.token][0] + 1)
+            pending.append((self.token, self.column))
+            self.next()
+        self.reduce(operands, pending, 0)
+        if pending:
+            raise ParseError("unclosed '('", self.line, pending[-1][1])
+        return operands[0]
+
+    def reduce_negations(self, operands, pending):
+        while pending and pending[-1][0] == '!':
+            pending.pop()
+            operands.append(('!', operands.pop()))
+
+    def reduce(self, operands, pending, power):
+
+        """
+        Applies the waiting binary operators binding at least as tightly as
+        power, stopping at an opening parenthesis.
+        """
+
+        while (pending and pending[-1][0] in operators
+               and operators[pending[-1][0]][0] >= power):
+            op = pending.pop()[0]
+            p2 = operands.pop()
+            p1 = operands.pop()
+            operands.append((op, p1, p2))
+
+
+def flatten_operands(tree):
+
+    """
+    Returns the operands of a binary operation tree, looking through the
+    nested operations of the same operator : A + (B + C) has 3 operands.
+
+    Each nested operation is consumed by the outermost one, so flattening
+    a whole rule is linear.
+    """
+
+    operands = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple) and node[0] == tree[0]:
+            stack.extend(reversed(node[1:]))
         else:
-            raise Exception
-    elif l.find('=>') != -1:
-        p = l.split('=>')
-        if len(p) == 2:
-            p1 = create_predicate(p[0])
-            p2 = create_predicate(p[1])
-            create_implication(p1, p2)
+            operands.append(node)
+    return operands
+
+def make_predicate(tree, kb):
+
+    """
+    Returns the predicate of a syntax tree (see RuleParser), created in kb.
+
+    Nested operations of the same operator make a single n-ary predicate
+    (see flatten_operands()). The tree is walked with an explicit stack,
+    operands first.
+    """
+
+    built = []
+    stack = [(tree, False)]
+    while stack:
+        node, ready = stack.pop()
+        if isinstance(node, str):
+            built.append(src.Predicates.AtomicPredicate(node, kb=kb))
+        elif not ready:
+            if node[0] != '!':
+                node = (node[0],) + tuple(flatten_operands(node))
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node[1:]))
         else:
-            raise Exception
+            operands = built[len(built) - len(node) + 1:]
+            del built[len(built) - len(node) + 1:]
+            if node[0] == '!':
+                built.append(src.Predicates.NotPredicate(*operands, kb=kb))
+            else:
+                built.append(operators[node[0]][1](*operands, kb=kb))
+    return built[0]
+
+def create_predicate(s, kb, line=None):
+
+    """
+    Returns the predicate of the expression s.
+    """
+
+    parser = RuleParser(s, line)
+    tree = parser.parse_expression()
+    if parser.token is not None:
+        raise parser.error(
+            "expected end of expression, found {}".format(parser.describe())
+        )
+    return make_predicate(tree, kb)
+
+def add_rule(rule, kb):
+
+    """
+    Adds a rule parsed by RuleParser.parse_rule() to kb.
+    """
+
+    tree1, arrow, tree2 = rule
+    p1 = make_predicate(tree1, kb)
+    p2 = make_predicate(tree2, kb)
+    if arrow == '<=>':
+        create_equivalence(p1, p2)
     else:
-        raise Exception
+        create_implication(p1, p2)
+
+def parse_rule(l, kb, line=None):
+    add_rule(RuleParser(l, line).parse_rule(), kb)
     
 
-def parse_initial_facts(line):
-    for letter in clean_line(line)[1:]:
-        src.Predicates.AtomicPredicate(letter).set_initial_state()
+def parse_initial_facts(line, kb):
+
+    """
+    Sets the facts of a cleaned facts line (see clean_line()).
+    """
+
+    for letter in line[1:]:
+        src.Predicates.AtomicPredicate(letter, kb=kb).set_initial_state()
                 
-def parse_queries(line):
+def parse_queries(line, kb):
+
+    """
+    Returns the queried predicates of a cleaned queries line.
+    """
+
     queries = set()
-    for letter in clean_line(line)[1:]:
-        queries.add(src.Predicates.AtomicPredicate(letter))
+    for letter in line[1:]:
+        queries.add(src.Predicates.AtomicPredicate(letter, kb=kb))
     return queries
 
-def parse(filename):
-    state = 0
+def parse(filename, kb=None):
+
+    """
+    Parses the given file into a knowledge base (a new one if kb isn't given)
+    and returns it, the queried predicates are in its queries attribute.
+
+    The file is streamed (see read_lines() and read_statements()), so only a
+    chunk of it is in memory at a time. Equivalences between the created
+    predicates are linked in a single pass once the whole file is read.
+    """
+
+    if kb is None:
+        kb = src.KnowledgeBase.KnowledgeBase()
+    kb.deferred_linking = True
+    try:
+        kb.queries = parse_lines(filename, kb)
+    finally:
+        kb.deferred_linking = False
+    kb.link_pending()
+    return kb
+
+def parse_lines(filename, kb):
+
+    """
+    Parses the given file into kb and returns the queried predicates.
+
+    The lines, statements and predicates are produced by a pipeline of
+    generators, nothing is kept but the knowledge base itself.
+    """
 
     with open(filename) as f:
-        for line in f:
-            line = clean_line(line)
-            if state == 0:  # empty lines before rules
-                if not is_empty_line(line):
-                    state = 1
-            if state == 1:  # rules
-                if line.startswith('?'):
-                    state = 6
-                elif line.startswith('='):
-                    state = 3
-                elif is_empty_line(line):
-                    state = 2
-                else:
-                    parse_rule(line)
-            if state == 2:  # empty lines after rules, before initial facts.
-                if not is_empty_line(line):
-                    state = 3
-            if state == 3:  # initial facts
-                parse_initial_facts(line)
-                state = 4
-                continue
-            if state == 4:  #
-                if not is_empty_line(line):
-                    raise Exception("Syntax error in file")
-                state = 5
-            if state == 5:  # empty lines after rules, after initial facts, before queries
-                if not is_empty_line(line):
-                    state = 6
-            if state == 6:  # queries
-                queries = parse_queries(line)
-                state = 7
-                continue
-            if state == 6:
-                if not is_empty_line(line):
-                    raise Exception("Syntax error in file")
+        return load_statements(read_statements(read_lines(f)), kb)
+
+CHUNK_SIZE = 1 << 20
+
+def read_lines(f, chunk_size=CHUNK_SIZE):
+
+    """
+    Yields the lines of the file object f (without their end of line),
+    reading it by chunks of chunk_size characters.
+    """
+
+    rest = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split('\n')
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+def read_statements(lines):
+
+    """
+    Yields the statements of a rule file given its lines, as (kind, value)
+    pairs :
+    - ('rule', (premise, arrow, conclusion)), see RuleParser.parse_rule().
+    - ('facts', cleaned facts line).
+    - ('queries', cleaned queries line).
+
+    Each line is cleaned once, syntax errors raise a ParseError.
+    """
+
+    state = 0
+    for number, raw_line in enumerate(lines, 1):
+        line = clean_line(raw_line)
+        if state == 0:  # empty lines before rules
+            if line:
+                state = 1
+        if state == 1:  # rules
+            if line.startswith('?'):
+                state = 6
+            elif line.startswith('='):
+                state = 3
+            elif not line:
+                state = 2
+            else:
+                yield 'rule', RuleParser(raw_line, number).parse_rule()
+        if state == 2:  # empty lines after rules, before initial facts.
+            if line:
+                state = 3
+        if state == 3:  # initial facts
+            yield 'facts', line
+            state = 4
+            continue
+        if state == 4:  #
+            if line:
+                raise ParseError("syntax error", number)
+            state = 5
+        if state == 5:  # empty lines after rules, after initial facts, before queries
+            if line:
+                state = 6
+        if state == 6:  # queries
+            yield 'queries', line
+            state = 7
+            continue
+
+def load_statements(statements, kb):
+
+    """
+    Adds the statements yielded by read_statements() to kb and returns the
+    queried predicates.
+    """
+
+    queries = None
+    for kind, value in statements:
+        if kind == 'rule':
+            add_rule(value, kb)
+        elif kind == 'facts':
+            parse_initial_facts(value, kb)
+        else:
+            queries = parse_queries(value, kb)
     return queries
 
 
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import sys
+import unittest
+
+################################################################################
+#                                Command line                                  #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+root = os.path.dirname(directory)
+
+
+def run_command(*args):
+
+    """
+    Returns the completed process of expert_system.py run with the given
+    arguments.
+    """
+
+    return subprocess.run(
+        [sys.executable, os.path.join(root, 'expert_system.py'), 'run']
+        + list(args),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, cwd=root
+    )
+
+
+class CommandTest(unittest.TestCase):
+
+    """
+    Checks how expert_system.py reports the arguments and the rule files it
+    can't process.
+    """
+
+    def test_unexplained_engines(self):
+
+        """
+        The engines that don't explain their values reject the options
+        asking for an explanation.
+        """
+
+        filename = os.path.join(directory, 'test3.txt')
+        for engine in ('compact', 'sat'):
+            for options in (('-v',), ('-d',), ('-f', 'json')):
+                with self.subTest(engine=engine, options=options):
+                    process = run_command('-e', engine, *options, filename)
+                    self.assertEqual(process.returncode, 2)
+                    self.assertEqual(process.stdout, '')
+                    self.assertIn('not supported', process.stderr)
+
+    def test_malformed_rules(self):
+        filename = os.path.join(directory, 'malformed.txt')
+        process = run_command(filename)
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(process.stdout, '')
+        self.assertEqual(
+            process.stderr, "%s:4:5: unclosed '('\n" % filename
+        )
+
+    def test_incoherent_facts(self):
+        filename = os.path.join(directory, 'incoherent.txt')
+        for engine in ('backward', 'forward', 'compact', 'sat'):
+            with self.subTest(engine=engine):
+                process = run_command('-e', engine, filename)
+                self.assertEqual(process.returncode, 1)
+                self.assertEqual(
+                    process.stderr,
+                    '%s: the facts contradict the rules\n' % filename
+                )
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+import src.parsing
+import src.Condensation
+import src.Context
+
+################################################################################
+#                        Strongly connected components                         #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+class ComponentsTest(unittest.TestCase):
+
+    """
+    Checks the dependencies of TopologicalSolver only follow the results
+    which can decide a predicate, so a chain of rules is solved one
+    predicate at a time.
+    """
+
+    def components(self, filename, name):
+        kb = src.parsing.parse(os.path.join(directory, filename))
+        solver = src.Condensation.TopologicalSolver(
+            src.Context.EvaluationContext(kb)
+        )
+        return [
+            [str(p) for p in component]
+            for component in src.Condensation.strongly_connected_components(
+                kb.find_atom(name), solver.dependencies
+            )
+        ]
+
+    def test_chain(self):
+        self.assertEqual(
+            self.components('chain.txt', 'E'),
+            [['A'], ['B'], ['C', 'D'], ['E']]
+        )
+
+
+if __name__ == '__main__':
+    pass
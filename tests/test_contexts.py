@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import concurrent.futures
+import os
+import random
+import sys
+import unittest
+import src.parsing
+import src.Context
+from src.Exceptions import IncoherenceError
+
+################################################################################
+#                         Concurrent evaluation contexts                       #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+names = 'ABCDEFGH'
+
+def evaluate(kb, facts, explain):
+
+    """
+    Returns the values of the atoms of kb named in names, solved in a new
+    evaluation context of the given fact names, or None if the facts
+    contradict the rules.
+    """
+
+    context = src.Context.EvaluationContext(
+        kb, [kb.find_atom(name) for name in facts]
+    )
+    atoms = [kb.find_atom(name) for name in names]
+    try:
+        if explain:
+            return [
+                None if p is None
+                else str(p.solve(context=context).result.value)
+                for p in atoms
+            ]
+        return [
+            None if p is None else str(p.evaluate(context).value)
+            for p in atoms
+        ]
+    except IncoherenceError:
+        return None
+
+
+class ConcurrentContextsTest(unittest.TestCase):
+
+    """
+    Solves random fact sets in evaluation contexts sharing one knowledge base
+    on a thread pool, and checks the values are the ones solved one fact set
+    at a time.
+    """
+
+    filenames = (
+        'incremental.txt', 'negation.txt', 'conjunction.txt', 'equivalence.txt'
+    )
+    fact_sets = 200
+    threads = 8
+
+    def check_contexts(self, filename, explain):
+        path = os.path.join(directory, filename)
+        kb = src.parsing.parse(path)
+        kb.build_results()
+        used = [name for name in names if kb.find_atom(name) is not None]
+        rng = random.Random(filename)
+        fact_sets = [
+            rng.sample(used, rng.randrange(len(used) + 1))
+            for _ in range(self.fact_sets)
+        ]
+        # the threads are switched as often as possible, so their solvings
+        # interleave.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(self.threads) as pool:
+                concurrent_values = list(pool.map(
+                    lambda facts: evaluate(kb, facts, explain), fact_sets
+                ))
+        finally:
+            sys.setswitchinterval(interval)
+        reference = src.parsing.parse(path)
+        reference.build_results()
+        for facts, values in zip(fact_sets, concurrent_values):
+            self.assertEqual(values, evaluate(reference, facts, explain),
+                             (filename, sorted(facts)))
+
+    def test_evaluate(self):
+        for filename in self.filenames:
+            self.check_contexts(filename, False)
+
+    def test_solve(self):
+        for filename in self.filenames:
+            self.check_contexts(filename, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+import src.parsing
+import src.KnowledgeBase
+import src.Predicates
+from src.Exceptions import IncoherenceError
+
+################################################################################
+#                                 Horn rules                                   #
+################################################################################
+
+names = 'ABCDEFGH'
+
+def random_horn_rules(rng):
+
+    """
+    Returns random rules whose premise and conclusion are conjunctions of
+    atoms, and random fact names.
+    """
+
+    def conjunction():
+        return ' + '.join(rng.sample(names, rng.randint(1, 3)))
+
+    rules = [
+        '%s %s %s' % (conjunction(), rng.choice(('=>', '<=>')), conjunction())
+        for _ in range(rng.randint(1, 6))
+    ]
+    return rules, rng.sample(names, rng.randint(0, 3))
+
+
+def evaluate(rules, facts, explain):
+
+    """
+    Returns the values of the atomic predicates named in names, solved in a
+    new knowledge base of the given rules and facts, or None if the facts
+    contradict the rules.
+    """
+
+    kb = src.KnowledgeBase.KnowledgeBase()
+    for rule in rules:
+        src.parsing.parse_rule(rule, kb)
+    for name in facts:
+        src.Predicates.AtomicPredicate(name, kb=kb).set_initial_state()
+    atoms = [kb.find_atom(name) for name in names]
+    try:
+        if explain:
+            return [
+                None if p is None else str(p.solve().result.value)
+                for p in atoms
+            ]
+        return [None if p is None else str(p.evaluate().value) for p in atoms]
+    except IncoherenceError:
+        return None
+
+
+class HornTest(unittest.TestCase):
+
+    """
+    Checks the values of random Horn knowledge bases are the same when the
+    Horn atoms are seeded (see src.Horn.HornIndex.seed(), only done without
+    explanations) and when the engine solves them.
+    """
+
+    knowledge_bases = 500
+
+    def test_seed(self):
+        rng = random.Random('horn')
+        for _ in range(self.knowledge_bases):
+            rules, facts = random_horn_rules(rng)
+            self.assertEqual(evaluate(rules, facts, False),
+                             evaluate(rules, facts, True),
+                             (rules, sorted(facts)))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import unittest
+import src.parsing
+import src.Predicates
+from src.Exceptions import IncoherenceError
+
+################################################################################
+#                          Incremental facts changes                           #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+names = 'ABCDEFGH'
+
+def evaluate(kb, explain):
+
+    """
+    Returns the values of the atomic predicates named in names, or None if
+    the facts contradict the rules.
+    """
+
+    preds = [src.Predicates.AtomicPredicate(name, kb=kb) for name in names]
+    try:
+        if explain:
+            return [str(p.solve().result.value) for p in preds]
+        return [str(p.evaluate().value) for p in preds]
+    except IncoherenceError:
+        return None
+
+
+def parse_with_facts(path, facts):
+    kb = src.parsing.parse(path)
+    kb.reset_facts()
+    for name in facts:
+        src.Predicates.AtomicPredicate(name, kb=kb).set_initial_state()
+    return kb
+
+
+class IncrementalFactsTest(unittest.TestCase):
+
+    """
+    Asserts and retracts random facts one at a time (see
+    KnowledgeBase.assert_fact()) and checks the values solved after each
+    change are the ones solved from scratch : once every value is forgotten,
+    and from the rules parsed again with the same facts.
+    """
+
+    filenames = ('incremental.txt', 'test3.txt', 'test4.txt')
+    steps = 40
+
+    def check_changes(self, filename, explain):
+        path = os.path.join(directory, filename)
+        kb = src.parsing.parse(path)
+        invalidated = src.parsing.parse(path)
+        rng = random.Random(filename)
+        for step in range(self.steps):
+            name = rng.choice(names)
+            asserted = rng.random() < .5
+            for base in (kb, invalidated):
+                if asserted:
+                    base.assert_fact(name)
+                else:
+                    base.retract_fact(name)
+            facts = {p.name for p in kb.facts}
+            values = evaluate(kb, explain)
+            invalidated.memo.invalidate()
+            self.assertEqual(values, evaluate(invalidated, explain),
+                             (filename, sorted(facts)))
+            self.assertEqual(values,
+                             evaluate(parse_with_facts(path, facts), explain),
+                             (filename, sorted(facts)))
+
+    def test_evaluate(self):
+        for filename in self.filenames:
+            self.check_changes(filename, False)
+
+    def test_solve(self):
+        for filename in self.filenames:
+            self.check_changes(filename, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
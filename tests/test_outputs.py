@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import src.parsing
+import src.CompactGraph
+import src.Scenarios
+
+################################################################################
+#                               Expected outputs                               #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+root = os.path.dirname(directory)
+
+# rule files whose output is checked with every engine.
+filenames = (
+    'test.txt', 'test1.txt', 'test2.txt', 'test3.txt', 'test4.txt',
+    'negation.txt', 'conjunction.txt', 'equivalence.txt', 'disjunction.txt',
+    'operands.txt', 'support.txt',
+)
+
+# rule files solved against the scenarios of the .jsonl file of the same name.
+scenario_filenames = ('negation.txt', 'equivalence.txt')
+
+
+# engines whose values are cross-checked, the first one being the reference.
+engines = ('backward', 'forward', 'compact', 'sat')
+
+
+def run(*args):
+
+    """
+    Returns the standard output of expert_system.py run with the given
+    arguments.
+    """
+
+    return subprocess.run(
+        [sys.executable, os.path.join(root, 'expert_system.py'), 'run']
+        + list(args),
+        stdout=subprocess.PIPE, check=True, universal_newlines=True, cwd=root
+    ).stdout
+
+
+def compile_rules(filename, output):
+    subprocess.run(
+        [sys.executable, os.path.join(root, 'expert_system.py'), 'compile',
+         os.path.join(directory, filename), output],
+        check=True, cwd=root
+    )
+
+
+def expected_output(filename, mode):
+
+    """
+    Returns the content of the expected output of the given file in the given
+    mode, e.g. expected/negation.forward.txt for negation.txt.
+    """
+
+    name = os.path.splitext(filename)[0]
+    path = os.path.join(directory, 'expected', '%s.%s.txt' % (name, mode))
+    with open(path) as f:
+        return f.read()
+
+
+def make_runner(path, engine):
+
+    """
+    Returns a scenario runner of the given engine for the given rule file
+    (see src.Scenarios).
+    """
+
+    kb = src.parsing.parse(path)
+    if engine == 'compact':
+        return src.Scenarios.CompactScenarioRunner(
+            src.CompactGraph.CompactGraph.from_kb(kb)
+        )
+    if engine == 'sat':
+        return src.Scenarios.SatScenarioRunner(kb)
+    return src.Scenarios.ScenarioRunner(kb, engine)
+
+
+def file_scenarios(filename):
+
+    """
+    Returns the scenarios a rule file is checked against : its own facts and
+    queries, then the ones of the .jsonl file of the same name if any.
+    """
+
+    path = os.path.join(directory, filename)
+    kb = src.parsing.parse(path)
+    scenarios = [{
+        'facts' : ''.join(sorted(p.name for p in kb.facts)),
+        'queries' : ''.join(sorted(p.name for p in kb.queries))
+    }]
+    if filename in scenario_filenames:
+        scenarios.extend(src.Scenarios.read_scenarios(
+            os.path.join(directory, os.path.splitext(filename)[0] + '.jsonl')
+        ))
+    return scenarios
+
+
+class EnginesTest(unittest.TestCase):
+
+    """
+    Solves the rule files of the tests directory with every engine and checks
+    they find the same values, so the expected outputs aren't only checked
+    against themselves.
+
+    sat decides the values by entailment (see expert_system.ENGINE_HELP), it
+    may find UNDETERMINED the atoms the other engines choose a value for
+    (e.g. the operands of a TRUE disjunction conclusion).
+    """
+
+    def test_engines(self):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            runners = [make_runner(path, engine) for engine in engines]
+            for scenario in file_scenarios(filename):
+                reference = src.Scenarios.run_scenario(runners[0], scenario)
+                for engine, runner in zip(engines[1:], runners[1:]):
+                    with self.subTest(filename=filename, engine=engine,
+                                      scenario=scenario):
+                        output = src.Scenarios.run_scenario(runner, scenario)
+                        if (engine == 'sat' and 'results' in output
+                            and 'results' in reference):
+                            output['results'] = {
+                                q : reference['results'][q]
+                                if value == 'UNDETERMINED' else value
+                                for q, value in output['results'].items()
+                            }
+                        self.assertEqual(output, reference)
+
+
+class OutputsTest(unittest.TestCase):
+
+    """
+    Runs expert_system.py on the rule files of the tests directory and
+    compares its outputs to the ones of the expected directory, whose values
+    are the ones EnginesTest checks.
+    """
+
+    def check_outputs(self, mode, *options):
+        for filename in filenames:
+            with self.subTest(filename=filename):
+                self.assertEqual(
+                    run(*options, os.path.join(directory, filename)),
+                    expected_output(filename, mode)
+                )
+
+    def test_backward(self):
+        self.check_outputs('backward', '-e', 'backward')
+
+    def test_verbose(self):
+        self.check_outputs('verbose', '-v')
+
+    def test_forward(self):
+        self.check_outputs('forward', '-e', 'forward')
+
+    def test_compact(self):
+        self.check_outputs('compact', '-e', 'compact')
+
+    def test_sat(self):
+        self.check_outputs('sat', '-e', 'sat')
+
+    def check_scenarios(self, engine, *options):
+        for filename in scenario_filenames:
+            scenarios = os.path.splitext(filename)[0] + '.jsonl'
+            with self.subTest(filename=filename):
+                self.assertEqual(
+                    run(
+                        '-e', engine, *options,
+                        '-s', os.path.join(directory, scenarios),
+                        os.path.join(directory, filename)
+                    ),
+                    expected_output(filename, 'scenarios.' + engine)
+                )
+
+    def test_scenarios(self):
+        for engine in ('backward', 'forward', 'compact', 'sat'):
+            self.check_scenarios(engine)
+
+    def test_parallel_scenarios(self):
+        for engine in ('backward', 'forward', 'compact'):
+            self.check_scenarios(engine, '-j', '3')
+
+    def test_compiled(self):
+
+        """
+        The compiled rule files are solved as the rule files themselves.
+        """
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for filename in filenames:
+                output = os.path.join(tmp, filename + '.kb')
+                compile_rules(filename, output)
+                for engine in ('compact', 'backward', 'forward', 'sat'):
+                    with self.subTest(filename=filename, engine=engine):
+                        self.assertEqual(
+                            run('-e', engine, output),
+                            expected_output(filename, engine)
+                        )
+                with self.subTest(filename=filename, verbose=True):
+                    self.assertEqual(
+                        run('-v', output),
+                        run('-v', os.path.join(directory, filename))
+                    )
+
+
+if __name__ == '__main__':
+    pass
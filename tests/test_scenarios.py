@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+import src.parsing
+import src.CompactGraph
+import src.Scenarios
+
+################################################################################
+#                                 Scenarios                                    #
+################################################################################
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_runners(path):
+
+    """
+    Returns the (knowledge base, runner) pairs of every engine for the given
+    rule file.
+    """
+
+    runners = []
+    for engine in ('backward', 'forward'):
+        kb = src.parsing.parse(path)
+        runners.append((kb, src.Scenarios.ScenarioRunner(kb, engine)))
+    kb = src.parsing.parse(path)
+    runners.append((kb, src.Scenarios.ScenarioRunner(kb, isolated=True)))
+    kb = src.parsing.parse(path)
+    runners.append((kb, src.Scenarios.CompactScenarioRunner(
+        src.CompactGraph.CompactGraph.from_kb(kb)
+    )))
+    kb = src.parsing.parse(path)
+    runners.append((kb, src.Scenarios.SatScenarioRunner(kb)))
+    return runners
+
+
+class ScenariosTest(unittest.TestCase):
+
+    """
+    Checks the scenarios naming atoms the rules don't use are solved without
+    creating any predicate.
+    """
+
+    def test_unnamed_atoms(self):
+        path = os.path.join(directory, 'negation.txt')
+        for kb, runner in make_runners(path):
+            with self.subTest(runner=type(runner).__name__):
+                size = len(kb.list_predicates())
+                output = src.Scenarios.run_scenario(
+                    runner, {'id': 1, 'facts': '=AZ', 'queries': '?BYZ'}
+                )
+                self.assertEqual(output['results'], {
+                    'B' : 'FALSE', 'Y' : 'FALSE', 'Z' : 'TRUE'
+                })
+                self.assertEqual(len(kb.list_predicates()), size)
+                self.assertIsNone(kb.find_atom('Z'))
+
+    def test_invalid_scenarios(self):
+        path = os.path.join(directory, 'negation.txt')
+        for kb, runner in make_runners(path):
+            for scenario in ({'facts': '=a', 'queries': '?B'},
+                             {'facts': '=A', 'queries': 1}, []):
+                with self.subTest(runner=type(runner).__name__,
+                                  scenario=scenario):
+                    size = len(kb.list_predicates())
+                    output = src.Scenarios.run_scenario(runner, scenario)
+                    self.assertEqual(output['error'], 'invalid scenario')
+                    self.assertNotIn('results', output)
+                    self.assertEqual(len(kb.list_predicates()), size)
+
+
+if __name__ == '__main__':
+    unittest.main()